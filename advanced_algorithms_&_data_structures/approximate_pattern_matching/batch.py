@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from io import BytesIO
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from hdbwtpm import FMIndex, hdbwtpm_index
+from fmindex import write_index, attach_index
+from utils import read_file
+import sys
+
+DEFAULT_PATTERNS_PER_TASK = 16
+
+fm_index = None     # index of a worker process, attached once per worker by init_worker
+
+
+def share_index(data: bytes) -> SharedMemory:
+    """
+    Copy an index, in the format of fmindex.write_index, into a new shared memory block. The caller owns the block and
+    must close and unlink it.
+
+    :param data: index file content
+    :return: shared memory block holding the index
+    """
+    shm = SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def init_worker(shm_name: str) -> None:
+    """
+    Initializer of the worker processes, which attach to the index in shared memory instead of receiving a copy of it
+
+    :param shm_name: name of the shared memory block holding the index
+    :return: None
+    """
+    global fm_index
+    shm = SharedMemory(name=shm_name)
+    fm_index = attach_index(shm.buf)
+    fm_index.mapped = shm
+
+
+def count_pattern(pat: str, max_d: int) -> list[int]:
+    """
+    Worker function to answer one pattern against the index of the worker
+
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] is the number of matches with exactly d mismatches
+    """
+    return hdbwtpm_index(fm_index, pat, max_d)
+
+
+def batch_hdbwtpm(data: bytes, pats: list[str], max_d: int, workers: int = None,
+                  patterns_per_task: int = DEFAULT_PATTERNS_PER_TASK, cache: dict = None) -> tuple[list[list[int]], dict]:
+    """
+    Answer many patterns in parallel against one index. The index is put once in shared memory and every worker of the
+    pool attaches to it, each distinct pattern is answered once, and the answers are memoized in cache, which can be
+    passed again to reuse them in later batches. The answers are kept per index, under a digest of its content, and
+    keyed by (pattern, max_d), so a batch against another index or with another max_d never reads them.
+
+    :param data: index file content, see fmindex.write_index
+    :param pats: patterns to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param patterns_per_task: number of patterns sent to a worker at a time
+    :param cache: memoized answers, index digest -> {(pattern, max_d) -> list of counts}, updated in place
+    :return: tuple of the answers in the order of the patterns, and a report with the number of queries, of distinct
+             patterns searched, the wall time and the queries per second
+    """
+    start = perf_counter()
+    cache = {} if cache is None else cache
+    answers = cache.setdefault(blake2b(data, digest_size=16).digest(), {})
+    missing = [pat for pat in dict.fromkeys(pats) if (pat, max_d) not in answers]
+
+    if missing:
+        shm = share_index(data)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(shm.name,)) as executor:
+                counts = executor.map(count_pattern, missing, [max_d] * len(missing), chunksize=patterns_per_task)
+                answers.update(zip([(pat, max_d) for pat in missing], counts))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    seconds = perf_counter() - start
+    report = {
+        "queries": len(pats),
+        "searched": len(missing),
+        "seconds": seconds,
+        "queries_per_second": len(pats) / seconds,
+    }
+    return [answers[(pat, max_d)] for pat in pats], report
+
+
+def read_patterns(file_path: str) -> list[str]:
+    """
+    Utility function to read a file with one pattern per line
+
+    :param file_path: file path
+    :return: patterns
+    """
+    f = open(file_path, "r")
+    pats = f.read().splitlines()
+    f.close()
+    return pats
+
+
+if __name__ == "__main__":
+    # python batch.py <bwt file or .fmi index file> <pattern file, one pattern per line> <max_d> [workers]
+    _, filename1, filename2, max_d, *rest = sys.argv
+    if filename1.endswith(".fmi"):
+        index_file = open(filename1, "rb")
+        index_data = index_file.read()
+        index_file.close()
+    else:
+        stream = BytesIO()
+        write_index(FMIndex(read_file(filename1)), stream)
+        index_data = stream.getvalue()
+
+    patterns = read_patterns(filename2)
+    results, totals = batch_hdbwtpm(index_data, patterns, int(max_d), int(rest[0]) if rest else None)
+    f = open("output_hdbwtpm_batch.txt", "w")
+    for pattern, counts in zip(patterns, results):
+        for d, count in enumerate(counts):
+            f.write(f"pattern = {pattern}, d = {d}, nMatches = {count}\n")
+    f.close()
+    print(f"{totals['queries']} queries ({totals['searched']} distinct) in {totals['seconds']:.3f}s: "
+          f"{totals['queries_per_second']:.1f} queries/s")
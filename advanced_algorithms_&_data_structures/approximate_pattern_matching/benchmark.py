@@ -0,0 +1,250 @@
+from random import Random
+from timeit import repeat
+import sys
+import tracemalloc
+from utils import make_bwt
+from hdbwtpm import hdbwtpm, hdbwtpm_index, get_rank, get_occurrences, SampledOccurrences, FMIndex, search_bands, \
+    search_bands_recursive
+from locate import SampledSuffixArray, hdbwtpm_locate
+from seeds import SeedIndex, BidirectionalIndex, hdbwtpm_seeds, hdbwtpm_bidirectional
+
+
+def dna_text(size: int, seed: int = 0) -> str:
+    """
+    Utility function to generate a DNA-like text over the alphabet {A, C, G, T}, terminated by "$"
+
+    :param size: length of the text, terminating character excluded
+    :param seed: seed of the random generator
+    :return: generated text
+    """
+    rng = Random(seed)
+    return "".join(rng.choices("ACGT", k=size)) + "$"
+
+
+def time_call(function, *args, runs: int = 3) -> float:
+    """
+    Utility function to time a call, taking the best of several runs to reduce noise
+
+    :param function: function to time
+    :param args: arguments of the function
+    :param runs: number of timed runs
+    :return: best wall time in seconds
+    """
+    return min(repeat(lambda: function(*args), number=1, repeat=runs))
+
+
+def count_each_distance(fm_index: FMIndex, pat: str, max_d: int) -> list[int]:
+    """
+    Baseline of measure_distances, counting the matches of every distance with its own search, one traversal with a
+    maximum of d mismatches for each d, keeping only its count of exactly d mismatches
+
+    :param fm_index: index of the bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] is the number of matches with exactly d mismatches
+    """
+    return [hdbwtpm_index(fm_index, pat, d)[d] for d in range(max_d + 1)]
+
+
+def measure_distances(txt_size: int, m: int, max_ds: list[int]) -> None:
+    """
+    Time the counts of every distance up to growing maximum distances, on a DNA-like text with a pattern taken from its
+    middle, with a single traversal against the baseline of one traversal per distance
+
+    :param txt_size: length of the generated text
+    :param m: length of the pattern
+    :param max_ds: maximum numbers of mismatches
+    :return: None
+    """
+    txt = dna_text(txt_size)
+    fm_index = FMIndex(make_bwt(txt))
+    pat = txt[txt_size // 2: txt_size // 2 + m]
+    print(f"{'max_d':>5} {'single (s)':>10} {'baseline (s)':>12} {'speedup':>8}  matches per distance")
+    for max_d in max_ds:
+        single = time_call(hdbwtpm_index, fm_index, pat, max_d)
+        baseline = time_call(count_each_distance, fm_index, pat, max_d)
+        output = hdbwtpm_index(fm_index, pat, max_d)
+        print(f"{max_d:>5} {single:>10.4f} {baseline:>12.4f} {baseline / single:>7.1f}x  {output}")
+
+
+def measure_memory(build, *args) -> tuple[object, int]:
+    """
+    Measure the memory retained by a constructor
+
+    :param build: function to call
+    :param args: arguments of the function
+    :return: tuple of the result and the number of bytes it retains
+    """
+    tracemalloc.start()
+    result = build(*args)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
+
+
+def compare_sample_rates(txt_size: int, sample_rates: list[int], m: int = 12, max_d: int = 2,
+                         queries: int = 100000) -> None:
+    """
+    Compare the memory and the query latency of the full occurrences lists against SampledOccurrences for several sample
+    rates, with random rank queries and with a whole hdbwtpm search
+
+    :param txt_size: length of the generated text
+    :param sample_rates: sample rates of SampledOccurrences
+    :param m: length of the pattern of the hdbwtpm search
+    :param max_d: maximum number of mismatches of the hdbwtpm search
+    :param queries: number of random rank queries
+    :return: None
+    """
+    txt = dna_text(txt_size)
+    bwt = make_bwt(txt)
+    pat = txt[txt_size // 2: txt_size // 2 + m]
+    alphabet = list(get_rank(bwt).keys())
+    rng = Random(0)
+    positions = [(rng.choice(alphabet), rng.randrange(len(bwt) + 1)) for _ in range(queries)]
+
+    def query(occurrences):
+        for char, i in positions:
+            occurrences[char][i]
+
+    print(f"{'sample rate':>11} {'memory (bytes)':>15} {'query (ns)':>11} {'hdbwtpm (s)':>12}")
+    for sample_rate in [None] + sample_rates:
+        if sample_rate is None:
+            occurrences, memory = measure_memory(get_occurrences, bwt, alphabet)
+        else:
+            occurrences, memory = measure_memory(SampledOccurrences, bwt, alphabet, sample_rate)
+        latency = time_call(query, occurrences) / queries * 1e9
+        search = time_call(hdbwtpm, bwt, pat, max_d, sample_rate)
+        print(f"{sample_rate or 'full':>11} {memory:>15} {latency:>11.0f} {search:>12.4f}")
+
+
+def compare_locate_rates(txt_size: int, sample_rates: list[int], m: int = 8, max_d: int = 2) -> None:
+    """
+    Compare the memory of the sampled suffix array against the time to locate every approximate match of a pattern,
+    for several suffix array sample rates
+
+    :param txt_size: length of the generated text
+    :param sample_rates: sample rates of SampledSuffixArray
+    :param m: length of the pattern
+    :param max_d: maximum number of mismatches
+    :return: None
+    """
+    txt = dna_text(txt_size)
+    fm_index = FMIndex(make_bwt(txt))
+    pat = txt[txt_size // 2: txt_size // 2 + m]
+    print(f"{'sample rate':>11} {'memory (bytes)':>15} {'matches':>8} {'locate (s)':>11} {'per match (us)':>15}")
+    for sample_rate in sample_rates:
+        suffix_array = SampledSuffixArray(fm_index, sample_rate)
+        matches = sum(map(len, hdbwtpm_locate(fm_index, suffix_array, pat, max_d)))
+        seconds = time_call(hdbwtpm_locate, fm_index, suffix_array, pat, max_d)
+        print(f"{sample_rate:>11} {suffix_array.nbytes():>15} {matches:>8} {seconds:>11.4f} "
+              f"{seconds / max(1, matches) * 1e6:>15.1f}")
+
+
+def compare_search_engines(txt_size: int, pat_sizes: list[int], max_ds: list[int], no_of_patterns: int = 10) -> None:
+    """
+    Compare the nodes visited and the wall time of the recursive backward search against the iterative one with lower
+    bound pruning, on patterns taken from a DNA-like text with a few random substitutions
+
+    :param txt_size: length of the generated text
+    :param pat_sizes: lengths of the patterns
+    :param max_ds: maximum numbers of mismatches
+    :param no_of_patterns: number of patterns per measurement
+    :return: None
+    """
+    txt = dna_text(txt_size)
+    fm_index = FMIndex(make_bwt(txt))
+    rng = Random(1)
+    print(f"{'m':>4} {'max_d':>5} {'nodes (rec)':>12} {'nodes (iter)':>12} {'time (rec)':>11} {'time (iter)':>11}")
+    for m in pat_sizes:
+        pats = []
+        for _ in range(no_of_patterns):
+            start = rng.randrange(txt_size - m)
+            pat = list(txt[start:start + m])
+            for i in rng.sample(range(m), 2):
+                pat[i] = rng.choice("ACGT")
+            pats.append("".join(pat))
+
+        for max_d in max_ds:
+            row = []
+            for search in (search_bands_recursive, search_bands):
+                stats = {"nodes": 0}
+                for pat in pats:
+                    search(fm_index, pat, max_d, lambda sp, ep, mismatches: None, stats)
+                seconds = time_call(lambda: [search(fm_index, pat, max_d, lambda *band: None) for pat in pats])
+                row.append((stats["nodes"], seconds))
+            (rec_nodes, rec_time), (iter_nodes, iter_time) = row
+            print(f"{m:>4} {max_d:>5} {rec_nodes:>12} {iter_nodes:>12} {rec_time:>11.4f} {iter_time:>11.4f}")
+
+
+def compare_seed_strategies(txt_size: int, m: int, max_ds: list[int], no_of_patterns: int = 10) -> None:
+    """
+    Compare the backward search against the pigeonhole seed-and-extend search and the bidirectional search scheme for
+    growing maximum distances, on patterns taken from a DNA-like text with 3 random substitutions
+
+    :param txt_size: length of the generated text
+    :param m: length of the patterns
+    :param max_ds: maximum numbers of mismatches
+    :param no_of_patterns: number of patterns per measurement
+    :return: None
+    """
+    txt = dna_text(txt_size)
+    bwt = make_bwt(txt)
+    fm_index = FMIndex(bwt)
+    strategies = {
+        "backward": (hdbwtpm_index, fm_index),
+        "seeds": (hdbwtpm_seeds, SeedIndex(fm_index)),
+        "bidirectional": (hdbwtpm_bidirectional, BidirectionalIndex(bwt)),
+    }
+    rng = Random(2)
+    pats = []
+    for _ in range(no_of_patterns):
+        start = rng.randrange(txt_size - m)
+        pat = list(txt[start:start + m])
+        for i in rng.sample(range(m), 3):
+            pat[i] = rng.choice("ACGT")
+        pats.append("".join(pat))
+
+    print(f"{'max_d':>5} " + " ".join(f"{name:>14}" for name in strategies) + "  same output")
+    for max_d in max_ds:
+        times = []
+        outputs = []
+        for search, index in strategies.values():
+            outputs.append([search(index, pat, max_d) for pat in pats])
+            times.append(time_call(lambda: [search(index, pat, max_d) for pat in pats], runs=1))
+        print(f"{max_d:>5} " + " ".join(f"{seconds:>14.4f}" for seconds in times) +
+              f"  {all(output == outputs[0] for output in outputs)}")
+
+
+def compare_construction(txt_size: int, sample_rate: int = 64) -> None:
+    """
+    Compare the pure Python construction of the rank array, the full occurrences tables and the sampled checkpoints
+    against the NumPy one
+
+    :param txt_size: length of the generated text
+    :param sample_rate: sample rate of the checkpoints
+    :return: None
+    """
+    bwt = make_bwt(dna_text(txt_size))
+    alphabet = list(get_rank(bwt).keys())
+    builds = {
+        "get_rank": lambda vectorized: get_rank(bwt, vectorized),
+        "get_occurrences": lambda vectorized: get_occurrences(bwt, alphabet, vectorized),
+        "SampledOccurrences": lambda vectorized: SampledOccurrences(bwt, alphabet, sample_rate, vectorized),
+    }
+    print(f"{'structure':>18} {'python (s)':>11} {'numpy (s)':>10} {'speedup':>8}")
+    for name, build in builds.items():
+        python = time_call(build, False)
+        vectorized = time_call(build, True)
+        print(f"{name:>18} {python:>11.4f} {vectorized:>10.4f} {python / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    # python benchmark.py [text length] [pattern length]
+    txt_length = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    pat_length = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    measure_distances(txt_length, pat_length, [1, 2, 3, 4])
+    compare_sample_rates(txt_length, [1, 8, 32, 64, 256, 1024])
+    compare_locate_rates(txt_length, [1, 4, 16, 32, 64, 256])
+    compare_search_engines(txt_length, [12, 24, 48], [1, 2, 3, 4])
+    compare_seed_strategies(txt_length, 32, [1, 2, 3, 4, 5, 6])
+    compare_construction(txt_length)
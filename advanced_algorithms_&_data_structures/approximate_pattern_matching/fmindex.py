@@ -0,0 +1,220 @@
+from array import array
+from mmap import mmap, ACCESS_READ
+from typing import BinaryIO
+from hdbwtpm import FMIndex, hdbwtpm_index, output_results, DEFAULT_SAMPLE_RATE
+from utils import read_file
+import struct
+import sys
+
+MAGIC = b"FMIX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQIIB3x")   # magic, version, bwt size, sample rate, alphabet size, little endian, padding
+
+# Layout of an index file, every section starting at a multiple of 4 bytes:
+#     header
+#     alphabet: one latin-1 byte per character, padded with zeros
+#     ranks (C array): one uint32 per character, where the character first appears in the sorted first column
+#     checkpoints: for each character, blocks uint32 counts where checkpoint b is the number of occurrences in
+#                  bwt[:b * sample_rate], with blocks = ceil(N / sample_rate) + 1
+#     bwt: N latin-1 bytes
+
+
+def padded(size: int) -> int:
+    """
+    Helper function to round a section size up to a multiple of 4 bytes
+
+    :param size: size in bytes
+    :return: padded size
+    """
+    return -(-size // 4) * 4
+
+
+class MappedOccurrenceRow:
+    """
+    Occurrences of one character read from the checkpoints of an index file in memory, counting within a block on
+    demand from the bwt stored after them, see OccurrenceRow
+    """
+
+    __slots__ = ("bwt", "code", "checkpoints", "sample_rate")
+
+    def __init__(self, bwt: memoryview, code: int, checkpoints, sample_rate: int):
+        """
+        Constructor method for the MappedOccurrenceRow class
+
+        :param bwt: view of the latin-1 bwt in the index file
+        :param code: latin-1 code of the character
+        :param checkpoints: uint32 checkpoints of the character, a memoryview of the file or an array
+        :param sample_rate: number of positions between two checkpoints
+        """
+        self.bwt = bwt
+        self.code = code
+        self.checkpoints = checkpoints
+        self.sample_rate = sample_rate
+
+    def __getitem__(self, i: int) -> int:
+        """
+        Number of occurrences of the character in bwt[:i]
+
+        Time Complexity: O(sample_rate)
+
+        :param i: position, between 0 and N
+        """
+        block = i // self.sample_rate
+        return self.checkpoints[block] + bytes(self.bwt[block * self.sample_rate:i]).count(self.code)
+
+
+def write_index(fm_index: FMIndex, f: BinaryIO, sample_rate: int = None) -> None:
+    """
+    Write an index to a binary stream, the checkpoints being read from its occurrences whichever structure holds them
+
+    Time Complexity: O(|A| * N / sample_rate) queries of the occurrences
+
+    :param fm_index: index built from a bwt
+    :param f: binary stream opened for writing
+    :param sample_rate: number of positions between two checkpoints, defaults to the sample rate of the index
+    :return: None
+    """
+    sample_rate = sample_rate or fm_index.sample_rate or DEFAULT_SAMPLE_RATE
+    size = fm_index.size
+    if size >= 1 << 32:
+        raise ValueError(f"bwt of {size} characters is too large for 32-bit checkpoints")
+
+    alphabet = "".join(fm_index.alphabet).encode("latin-1")
+    blocks = -(-size // sample_rate) + 1
+    ranks = array("I", [fm_index.ranks[char] for char in fm_index.alphabet])
+    checkpoints = array("I")
+    for char in fm_index.alphabet:
+        row = fm_index.occurrences[char]
+        checkpoints.extend(row[min(b * sample_rate, size)] for b in range(blocks))
+    if sys.byteorder != "little":   # the file is always little endian
+        ranks.byteswap()
+        checkpoints.byteswap()
+
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, size, sample_rate, len(alphabet), 1))
+    f.write(alphabet.ljust(padded(len(alphabet)), b"\0"))
+    f.write(ranks.tobytes())
+    f.write(checkpoints.tobytes())
+    f.write(fm_index.bwt.encode("latin-1"))
+
+
+def save_index(fm_index: FMIndex, file_path: str, sample_rate: int = None) -> None:
+    """
+    Write an index to a file, see write_index
+
+    :param fm_index: index built from a bwt
+    :param file_path: file path
+    :param sample_rate: number of positions between two checkpoints, defaults to the sample rate of the index
+    :return: None
+    """
+    f = open(file_path, "wb")
+    write_index(fm_index, f, sample_rate)
+    f.close()
+
+
+def attach_index(buffer) -> FMIndex:
+    """
+    Get the index stored in a buffer in the format of write_index, such as a memory-mapped file or a shared memory block.
+    Only the header, the alphabet and the ranks are read, the checkpoints and the bwt are used in place, so attaching
+    does not depend on the size of the bwt. The byte order flag and the length of the buffer are checked against the
+    header first, so a foreign or truncated index raises ValueError instead of being read as garbage.
+
+    Time Complexity: O(|A|)
+
+    :param buffer: bytes-like object holding the index
+    :return: the index, whose occurrences are views of the buffer
+    """
+    view = memoryview(buffer)
+    length = len(view)
+    if length < HEADER.size:
+        view.release()
+        raise ValueError(f"not a version {FORMAT_VERSION} FM-index, {length} bytes is shorter than its header")
+    magic, version, size, sample_rate, alphabet_size, little_endian = HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        view.release()
+        raise ValueError(f"not a version {FORMAT_VERSION} FM-index")
+    if little_endian != 1 or sample_rate < 1:
+        view.release()
+        raise ValueError(f"unsupported FM-index header, byte order flag {little_endian} and sample rate {sample_rate}")
+
+    offset = HEADER.size + padded(alphabet_size)
+    blocks = -(-size // sample_rate) + 1
+    bwt_offset = offset + 4 * alphabet_size + 4 * alphabet_size * blocks
+    if length < bwt_offset + size:  # checked before any view of the sections is made
+        view.release()
+        raise ValueError(f"truncated FM-index, {length} bytes instead of {bwt_offset + size}")
+
+    alphabet = bytes(view[HEADER.size:HEADER.size + alphabet_size]).decode("latin-1")
+    ranks = array("I", bytes(view[offset:offset + 4 * alphabet_size]))
+    offset += 4 * alphabet_size
+    bwt = view[bwt_offset:bwt_offset + size]
+    if sys.byteorder != "little":
+        ranks.byteswap()
+
+    fm_index = FMIndex(sample_rate=sample_rate)
+    fm_index.size = size
+    fm_index.first = bytes(bwt[:1]).decode("latin-1")
+    fm_index.alphabet = list(alphabet)
+    fm_index.ranks = dict(zip(alphabet, ranks))
+    for i, char in enumerate(alphabet):
+        start = offset + 4 * blocks * i
+        if sys.byteorder == "little":   # zero-copy view of the checkpoints
+            checkpoints = view[start:start + 4 * blocks].cast("I")
+        else:
+            checkpoints = array("I", bytes(view[start:start + 4 * blocks]))
+            checkpoints.byteswap()
+        fm_index.occurrences[char] = MappedOccurrenceRow(bwt, ord(char), checkpoints, sample_rate)
+    view.release()
+    return fm_index
+
+
+def load_index(file_path: str) -> FMIndex:
+    """
+    Memory-map an index file written by save_index, see attach_index. index.mapped holds the mapping, close it with
+    close_index.
+
+    Time Complexity: O(|A|)
+
+    :param file_path: file path
+    :return: the loaded index
+    """
+    f = open(file_path, "rb")
+    mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+    f.close()       # the mapping stays valid after the file is closed
+    try:
+        fm_index = attach_index(mapped)
+    except ValueError as error:
+        mapped.close()
+        raise ValueError(f"{file_path}: {error}")
+    fm_index.mapped = mapped
+    return fm_index
+
+
+def close_index(fm_index: FMIndex) -> None:
+    """
+    Release the views of an attached index and close its mapping, if it has one
+
+    :param fm_index: index returned by load_index or attach_index
+    :return: None
+    """
+    for row in fm_index.occurrences.values():
+        if isinstance(row.checkpoints, memoryview):
+            row.checkpoints.release()
+        row.bwt.release()
+    fm_index.occurrences = {}
+    if fm_index.mapped is not None:
+        fm_index.mapped.close()
+
+
+if __name__ == "__main__":
+    # python fmindex.py build <bwt file> <index file> [sample rate]
+    # python fmindex.py <index file> <pattern file> <max_d>
+    if sys.argv[1] == "build":
+        _, _, filename1, filename2, *rest = sys.argv
+        rate = int(rest[0]) if rest else DEFAULT_SAMPLE_RATE
+        save_index(FMIndex(read_file(filename1), rate), filename2)
+    else:
+        _, filename1, filename2, max_d = sys.argv
+        loaded = load_index(filename1)
+        nMatches = hdbwtpm_index(loaded, read_file(filename2), int(max_d))
+        close_index(loaded)
+        output_results(nMatches, "output_hdbwtpm.txt")
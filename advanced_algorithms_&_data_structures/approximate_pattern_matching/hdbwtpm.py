@@ -1,13 +1,54 @@
+from array import array
 from utils import NO_OF_CHARS, char2index, index2char, read_file
+from functools import cache
 import sys
 
+# checkpoint spacing of SampledOccurrences, see benchmark.compare_sample_rates: at 64 the checkpoints of a 200000
+# character DNA bwt take 54KB instead of the 12.9MB of the full pure Python lists (3.2MB as NumPy-built arrays), for rank
+# queries about 3.5 times slower
+DEFAULT_SAMPLE_RATE = 64
 
-def get_rank(bwt: str):
+
+@cache
+def numpy_module():
+    """
+    Helper function to import NumPy on the first vectorized build, so that a process which only loads an index from a file
+    never pays for the import. NumPy is optional, the index is built in pure Python without it.
+
+    :return: the numpy module, or None when it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def bwt_codes(bwt: str):
+    """
+    Helper function to get the bwt as a NumPy array of uint8 character codes, without copying the encoded string
+
+    :param bwt: bwt string
+    :return: array of the latin-1 codes of the characters
+    """
+    np = numpy_module()
+    return np.frombuffer(bwt.encode("latin-1"), dtype=np.uint8)
+
+
+def get_rank(bwt: str, vectorized: bool = True):
     """
     Function to get the rank array indicating where each character of the alphabet first appears
     Complexity is bounded bwt string length and only the alphabets in the bwt will be inserted into the set. Furthermore, the terminating character $ will be removed from the dicitonary
 
+    :param bwt: bwt string
+    :param vectorized: count the characters with NumPy when it is available
     """
+    np = numpy_module() if vectorized else None
+    if np is not None:
+        counts = np.bincount(bwt_codes(bwt), minlength=256)[ord(index2char(0)):][:NO_OF_CHARS + 1]
+        positions = np.cumsum(counts) - counts
+        return {index2char(i): int(positions[i]) for i in range(1, NO_OF_CHARS + 1) if counts[i]}
+
     size = len(bwt)
     
     count_lst = [0 for _ in range(NO_OF_CHARS + 1)]     # O(1)
@@ -26,13 +67,25 @@ def get_rank(bwt: str):
     return position_set
 
 
-def get_occurrences(bwt, alphabet):
+def get_occurrences(bwt, alphabet, vectorized: bool = True):
     """
     Get the occurences information of each character at each position
 
     :param bwt: bwt string
     :param alphabet: characters used
+    :param vectorized: build the tables with NumPy cumulative sums when it is available, as array('I') tables instead of
+                       lists
     """
+    np = numpy_module() if vectorized else None
+    if np is not None:
+        codes = bwt_codes(bwt)
+        result = {}
+        for char in alphabet:   # O(|A| * N) in C
+            table = np.zeros(len(bwt) + 1, dtype=np.uint32)
+            np.cumsum(codes == ord(char), dtype=np.uint32, out=table[1:])
+            result[char] = array("I", table.tobytes())
+        return result
+
     result = {char: [0] for char in alphabet}   # O(1)
     for char in bwt:    # O(N)
         for key, occ_lst in result.items():     # O(1) as the number of items is bounded by alphabet size
@@ -41,7 +94,153 @@ def get_occurrences(bwt, alphabet):
     return result
 
 
-def hdbwtpm(bwt: str, pat: str, max_d: int):
+class OccurrenceRow:
+    """
+    Occurrences of one character, as checkpoints of the count every sample_rate positions. The count at any other position
+    is the preceding checkpoint plus the occurrences counted within the block on demand with str.count, which runs at C
+    speed.
+    """
+
+    __slots__ = ("bwt", "char", "checkpoints", "sample_rate")
+
+    def __init__(self, bwt: str, char: str, sample_rate: int, checkpoints: array = None):
+        """
+        Constructor method for the OccurrenceRow class
+
+        :param bwt: bwt string
+        :param char: character whose occurrences are counted
+        :param sample_rate: number of positions between two checkpoints
+        :param checkpoints: checkpoints computed beforehand, see sampled_checkpoints
+        """
+        self.bwt = bwt
+        self.char = char
+        self.sample_rate = sample_rate
+        if checkpoints is not None:
+            self.checkpoints = checkpoints
+            return
+        self.checkpoints = array("I", [0])   # checkpoints[b] is the number of occurrences in bwt[:b * sample_rate]
+        count = 0
+        for start in range(0, len(bwt), sample_rate):   # O(N / sample_rate) calls, O(N) characters counted in total
+            count += bwt.count(char, start, start + sample_rate)
+            self.checkpoints.append(count)
+
+    def __getitem__(self, i: int) -> int:
+        """
+        Number of occurrences of the character in bwt[:i]
+
+        Time Complexity: O(sample_rate)
+
+        :param i: position, between 0 and N
+        """
+        block = i // self.sample_rate
+        return self.checkpoints[block] + self.bwt.count(self.char, block * self.sample_rate, i)
+
+
+def sampled_checkpoints(bwt: str, alphabet, sample_rate: int) -> dict[str, array]:
+    """
+    Compute the checkpoints of every character at once with NumPy: the characters are mapped to dense codes, a single
+    bincount over (block, code) pairs gives the occurrences of every character in every block, and a cumulative sum over
+    the blocks gives the checkpoints
+
+    Time Complexity: O(N + |A| * N / sample_rate)
+
+    :param bwt: bwt string
+    :param alphabet: characters used
+    :param sample_rate: number of positions between two checkpoints
+    :return: dictionary mapping each character to its checkpoints, see OccurrenceRow
+    """
+    np = numpy_module()
+    size = len(bwt)
+    blocks = -(-size // sample_rate)
+    dense = np.full(256, len(alphabet), dtype=np.intp)     # characters outside of the alphabet share the last code
+    for code, char in enumerate(alphabet):
+        dense[ord(char)] = code
+    width = len(alphabet) + 1
+
+    pairs = np.arange(size, dtype=np.intp) // sample_rate * width + dense[bwt_codes(bwt)]
+    counts = np.bincount(pairs, minlength=blocks * width).reshape(blocks, width)
+    checkpoints = np.zeros((blocks + 1, width), dtype=np.uint32)
+    np.cumsum(counts, axis=0, dtype=np.uint32, out=checkpoints[1:])
+    return {char: array("I", checkpoints[:, code].tobytes()) for code, char in enumerate(alphabet)}
+
+
+class SampledOccurrences:
+    """
+    Compact rank structure, a drop-in replacement of the result of get_occurrences where occurrences[char][i] is still the
+    number of occurrences of char in bwt[:i]. Each character keeps 4 * N / sample_rate bytes of checkpoints instead of a
+    list of N + 1 integers, at the cost of counting up to sample_rate characters per query.
+    """
+
+    def __init__(self, bwt: str, alphabet, sample_rate: int = DEFAULT_SAMPLE_RATE, vectorized: bool = True):
+        """
+        Constructor method for the SampledOccurrences class
+
+        Time Complexity: O(|A| * N), O(N + |A| * N / sample_rate) with NumPy
+
+        :param bwt: bwt string
+        :param alphabet: characters used
+        :param sample_rate: number of positions between two checkpoints, larger rates use less memory and answer slower
+        :param vectorized: compute the checkpoints with sampled_checkpoints when NumPy is available
+        """
+        if sample_rate < 1:
+            raise ValueError(f"sample rate must be at least 1, got {sample_rate}")
+        self.sample_rate = sample_rate
+        if vectorized and numpy_module() is not None:
+            checkpoints = sampled_checkpoints(bwt, alphabet, sample_rate)
+            self.rows = {char: OccurrenceRow(bwt, char, sample_rate, checkpoints[char]) for char in alphabet}
+        else:
+            self.rows = {char: OccurrenceRow(bwt, char, sample_rate) for char in alphabet}
+
+    def __getitem__(self, char: str) -> OccurrenceRow:
+        """
+        Occurrences of a character, indexed by position
+        """
+        return self.rows[char]
+
+    def nbytes(self) -> int:
+        """
+        Method to get the size of the checkpoints in bytes, the bwt itself excluded
+        """
+        return sum(row.checkpoints.itemsize * len(row.checkpoints) for row in self.rows.values())
+
+
+class FMIndex:
+    """
+    Everything the backward search needs from a bwt: its size, its first character, the position where each character
+    first appears in the sorted first column (ranks) and the occurrences of each character at each position
+    """
+
+    def __init__(self, bwt: str = None, sample_rate: int = DEFAULT_SAMPLE_RATE, vectorized: bool = True):
+        """
+        Constructor method for the FMIndex class, building the index of the bwt if one is given
+
+        Time Complexity: O(N)
+
+        :param bwt: bwt string
+        :param sample_rate: number of positions between two checkpoints of the SampledOccurrences, or None to use the full
+                            occurrences lists of get_occurrences, which need far too much memory for large bwts
+        :param vectorized: build the index with NumPy when it is available
+        """
+        self.bwt = bwt
+        self.sample_rate = sample_rate
+        self.size = 0
+        self.first = ""
+        self.ranks = {}
+        self.alphabet = []
+        self.occurrences = {}
+        self.mapped = None      # memory map or shared memory block holding the index, see fmindex.attach_index
+        if bwt is not None:
+            self.size = len(bwt)
+            self.first = bwt[:1]
+            self.ranks = get_rank(bwt, vectorized)  # O(N)
+            self.alphabet = list(self.ranks.keys())     # O(1), keys in ranks are bounded by alphabet size
+            if sample_rate is None:
+                self.occurrences = get_occurrences(bwt, self.alphabet, vectorized)  # O(N)
+            else:
+                self.occurrences = SampledOccurrences(bwt, self.alphabet, sample_rate, vectorized)  # O(N)
+
+
+def hdbwtpm(bwt: str, pat: str, max_d: int, sample_rate: int = DEFAULT_SAMPLE_RATE):
     """
     Function to conduct hamming distance bwt pattern matching
 
@@ -52,67 +251,213 @@ def hdbwtpm(bwt: str, pat: str, max_d: int):
     :param bwt: bwt
     :param pat: pattern to be matched
     :param max_d: maximum number of mismatches allowed (hamming distance)
+    :param sample_rate: number of positions between two checkpoints of the SampledOccurrences, or None to use the full
+                        occurrences lists of get_occurrences, which need far too much memory for large bwts
     """
+    return hdbwtpm_index(FMIndex(bwt, sample_rate), pat, max_d)
 
-    size = len(bwt)
-    ranks = get_rank(bwt)   # O(N)
-    alphabet = list(ranks.keys())   # O(1), keys in ranks are bounded by alphabet size
-    occurrences = get_occurrences(bwt, alphabet)    # O(N)
 
-    def aux_hdbwtpm(sp, ep, mismatch_left, pat, index, depth=0):
+def hdbwtpm_index(fm_index: FMIndex, pat: str, max_d: int):
+    """
+    Hamming distance bwt pattern matching against an index which is already built, or loaded from a file
+
+    :param fm_index: index of the bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] is the number of matches with exactly d mismatches
+    """
+    output = [0 for _ in range(max_d + 1)]     # output[d] is the number of matches with exactly d mismatches
+
+    def count(sp, ep, mismatches):
+        output[mismatches] += ep - sp
+
+    search_bands(fm_index, pat, max_d, count)
+    return output
+
+
+def occurs(fm_index: FMIndex, pat: str, start: int, end: int) -> bool:
+    """
+    Check whether pat[start:end] occurs in the text with an exact backward search
+
+    Time Complexity: O(end - start) occurrences queries
+
+    :param fm_index: index of the bwt
+    :param pat: pattern
+    :param start: start of the substring
+    :param end: end of the substring (exclusive)
+    :return: whether the substring occurs
+    """
+    ranks = fm_index.ranks
+    occurrences = fm_index.occurrences
+    sp, ep = 0, fm_index.size
+    for i in range(end - 1, start - 1, -1):
+        char = pat[i]
+        if char not in ranks:
+            return False
+        sp = ranks[char] + occurrences[char][sp]
+        ep = ranks[char] + occurrences[char][ep]
+        if ep <= sp:
+            return False
+    return True
+
+
+def lower_bounds(fm_index: FMIndex, pat: str) -> list[int]:
+    """
+    BWA-style lower bound array, where bounds[i] is a lower bound of the number of mismatches of any match of pat[0:i].
+    The pattern is split from the left into the shortest substrings which do not occur in the text, each of which needs
+    at least one mismatch, and bounds[i] counts the substrings ending by i. The end of each substring is found by binary
+    search since a substring which does not occur cannot be extended into one which does.
+
+    Time Complexity: O(m^2 log m) occurrences queries in the worst case, as each of the up to m substrings takes
+    O(log m) calls to occurs of up to O(m) queries each. BWA computes the bounds in one O(m) pass by extending forwards,
+    which needs an index of the reversed text that FMIndex does not have.
+
+    :param fm_index: index of the bwt
+    :param pat: pattern to be matched
+    :return: list of m + 1 lower bounds
+    """
+    m = len(pat)
+    bounds = [0 for _ in range(m + 1)]
+    start = 0
+    while start < m and not occurs(fm_index, pat, start, m):
+        low, high = start + 1, m    # pat[start:high] does not occur, find the smallest such high
+        while low < high:
+            middle = (low + high) // 2
+            if occurs(fm_index, pat, start, middle):
+                low = middle + 1
+            else:
+                high = middle
+        bounds[high] += 1
+        start = high
+    for i in range(1, m + 1):
+        bounds[i] += bounds[i - 1]
+    return bounds
+
+
+def search_bands(fm_index: FMIndex, pat: str, max_d: int, report, stats: dict = None) -> None:
+    """
+    Walk the backward search tree of the pattern once for all the distances, reporting the band of rows of every path
+    which reaches the start of the pattern with at most max_d mismatches. The tree is walked with an explicit stack, so
+    the pattern length is not bounded by the recursion limit, and a branch is pruned as soon as the mismatches it has
+    used plus the lower bound of what is left of the pattern exceed max_d.
+
+    :param fm_index: index of the bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :param report: function called with (sp, ep, mismatches) for each band [sp, ep) matching with that many mismatches
+    :param stats: if given, stats["nodes"] is increased by the number of nodes of the tree expanded, those with a
+                  non-empty band and some of the pattern left to match
+    :return: None
+    """
+    ranks = fm_index.ranks
+    alphabet = fm_index.alphabet
+    occurrences = fm_index.occurrences
+    m = len(pat)
+    if max_d < 0 or fm_index.size == 0:
+        return
+    if m == 0:
+        report(1, fm_index.size, 0)     # every row but the one of the suffix "$"
+        return
+
+    bounds = lower_bounds(fm_index, pat)
+    if bounds[m] > max_d:
+        return
+
+    nodes = 0
+    stack = [(0, fm_index.size, 0, m)]     # band, mismatches used, length of the pattern left to match
+    while stack:
+        sp, ep, mismatches, index = stack.pop()
+        nodes += 1
+        next_character = pat[index - 1]
+        bound = bounds[index - 1]
+        for char in alphabet:   # O(1) because alphabet size is constant
+            child_mismatches = mismatches if char == next_character else mismatches + 1
+            if child_mismatches + bound > max_d:    # the rest of the pattern cannot match within the budget
+                continue
+            top = ranks[char] + occurrences[char][sp]
+            bottom = ranks[char] + occurrences[char][ep]
+            if bottom <= top:
+                continue
+            if index == 1:
+                report(top, bottom, child_mismatches)
+            else:
+                stack.append((top, bottom, child_mismatches, index - 1))
+
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + nodes
+
+
+def search_bands_recursive(fm_index: FMIndex, pat: str, max_d: int, report, stats: dict = None) -> None:
+    """
+    Recursive version of search_bands without pruning, one call per node of the backward search tree, kept as the
+    baseline of benchmark.compare_search_engines
+
+    :param fm_index: index of the bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :param report: function called with (sp, ep, mismatches) for each band [sp, ep) matching with that many mismatches
+    :param stats: if given, stats["nodes"] is increased by the number of nodes of the tree expanded, those with a
+                  non-empty band and some of the pattern left to match
+    :return: None
+    """
+    size = fm_index.size
+    first = fm_index.first
+    ranks = fm_index.ranks
+    alphabet = fm_index.alphabet
+    occurrences = fm_index.occurrences
+
+    def aux_hdbwtpm(sp, ep, mismatches, pat, index, depth=0):
         """
-        auxiliary function to recursively find the matches
+        auxiliary function to recursively find the matches, reporting the band of each path reaching the start of the
+        pattern with its number of mismatches
 
         :param sp: starting pointer
         :param ep: ending pointer
-        :param mismatch_left: number of mismatches allowed
+        :param mismatches: number of mismatches used so far on the path
         :param pat: pattern to be matched
         :param index: index of the pattern we are looking at
         :param depth: to see which level of recursive call we are looking on
         """
+        # if the band size is less than or equal to 0
+        if ep - sp <= 0:
+            return
 
-        # if the band size is less than or equal to 0 or if the index is less than 0
-        if ep - sp <= 0 or index < 0:
-            return 0
-        
-        # if we are at the end of the pattern and no more mismatches allowed
-        # return band size
-        if index == 0 and mismatch_left == 0:
-            return ep - sp
+        # if we are at the end of the pattern, the whole band matches with this many mismatches
+        if index == 0:
+            report(sp, ep, mismatches)
+            return
+
+        # only the non-empty interior nodes are counted, like the nodes popped by search_bands
+        if stats is not None:
+            stats["nodes"] = stats.get("nodes", 0) + 1
 
-        ans = 0
         next_character = pat[index-1]
-        
+
         for char in alphabet:   # O(1) because alphabet size is constant
             # the fist character of the bwt is an edge case to consider because
             # when we are looking at it, we still need the entire band of that character
             # if the depth is 0, so we subtract 1 from the occurrences value
-            if char == bwt[0] and depth == 0:
+            if char == first and depth == 0:
                 rank_top = occurrences[char][sp] - 1
             else:
                 rank_top = occurrences[char][sp]
 
             rank_bottom = occurrences[char][ep]
-            
+
             # reduce pattern index each recursive call
-            if char == next_character :     # exact match 
-                ans += aux_hdbwtpm(ranks[char] + rank_top, 
-                                   ranks[char] + rank_bottom, 
-                                   mismatch_left, pat, index-1, depth + 1)
-            elif mismatch_left > 0:         # mismatch
-                # decrease mismatch
-                ans += aux_hdbwtpm(ranks[char] + rank_top,
-                                   ranks[char] + rank_bottom,
-                                   mismatch_left-1, pat, index-1, depth + 1)
-        return ans
-
-    output = []
-    # get the number of matches for each value less than or equal to max_d
-    for i in range(max_d + 1):
-        iMatches = aux_hdbwtpm(1, size, i, pat, len(pat))
-        output.append(iMatches)
+            if char == next_character :     # exact match
+                aux_hdbwtpm(ranks[char] + rank_top,
+                            ranks[char] + rank_bottom,
+                            mismatches, pat, index-1, depth + 1)
+            elif mismatches < max_d:        # mismatch
+                # increase mismatches
+                aux_hdbwtpm(ranks[char] + rank_top,
+                            ranks[char] + rank_bottom,
+                            mismatches+1, pat, index-1, depth + 1)
 
-    return output
+    # a single traversal finds the matches of every value less than or equal to max_d
+    if max_d >= 0:
+        aux_hdbwtpm(1, size, 0, pat, len(pat))
 
 
 def output_results(outputs: list, output_file: str) -> None:
@@ -131,8 +476,9 @@ def output_results(outputs: list, output_file: str) -> None:
 
 
 if __name__ == "__main__":
-    _, filename1, filename2, max_d = sys.argv
+    # python hdbwtpm.py <bwt file> <pattern file> <max_d> [sample rate]
+    _, filename1, filename2, max_d, *rest = sys.argv
     bwt = read_file(filename1)
     pat_str = read_file(filename2)
-    nMatches = hdbwtpm(bwt, pat_str, int(max_d))
+    nMatches = hdbwtpm(bwt, pat_str, int(max_d), int(rest[0]) if rest else DEFAULT_SAMPLE_RATE)
     output_results(nMatches, "output_hdbwtpm.txt")
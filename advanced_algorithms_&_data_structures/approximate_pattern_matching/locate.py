@@ -0,0 +1,144 @@
+from array import array
+from bisect import bisect_left
+from hdbwtpm import FMIndex, search_bands, DEFAULT_SAMPLE_RATE
+from utils import read_file
+import sys
+
+DEFAULT_SA_SAMPLE_RATE = 32
+LATIN_1 = [chr(code) for code in range(256)]
+
+
+def get_bwt_reader(fm_index: FMIndex):
+    """
+    Get the function reading the character of the bwt at a row, from the bwt string of the index, or for an index
+    loaded from a file, which has no bwt string, from the latin-1 bwt of the file shared by its occurrence rows, so
+    that the bwt is never decoded as a whole
+
+    :param fm_index: index of the bwt, built from the bwt string or loaded with fmindex.load_index
+    :return: function of a row returning its bwt character
+    """
+    if fm_index.bwt is not None:
+        return fm_index.bwt.__getitem__
+    if not fm_index.occurrences:
+        if fm_index.size > 1:
+            raise ValueError("the index has no bwt to read, it may have been closed")
+        return lambda row: "$"      # bwt of the empty text
+    view = next(iter(fm_index.occurrences.values())).bwt
+    return lambda row: LATIN_1[view[row]]
+
+
+class SampledSuffixArray:
+    """
+    Suffix array of the text of a bwt, keeping only the rows whose suffix starts at a multiple of sample_rate. The text
+    position of any other row is found by LF-mapping steps, each moving to the row of the suffix one position earlier,
+    until a sampled row is reached, which takes fewer than sample_rate steps.
+    """
+
+    def __init__(self, fm_index: FMIndex, sample_rate: int = DEFAULT_SA_SAMPLE_RATE):
+        """
+        Constructor method for the SampledSuffixArray class. The suffix array is not needed as an input, the text is walked
+        backwards from its last suffix "$" with LF-mapping, which visits every row once.
+
+        Time Complexity: O(N) LF-mapping steps
+
+        :param fm_index: index of the bwt, built from the bwt string or loaded from a file
+        :param sample_rate: distance between two sampled text positions, larger rates use less memory and locate slower
+        """
+        if sample_rate < 1:
+            raise ValueError(f"sample rate must be at least 1, got {sample_rate}")
+
+        self.fm_index = fm_index
+        self.sample_rate = sample_rate
+        self.bwt_at = get_bwt_reader(fm_index)
+        bwt_at = self.bwt_at
+        ranks = fm_index.ranks
+        occurrences = fm_index.occurrences
+
+        samples = []
+        row = 0     # the suffix "$" is the smallest, starting at the last position of the text
+        position = fm_index.size - 1
+        while position >= 0:    # O(N)
+            if position % sample_rate == 0:
+                samples.append((row, position))
+            char = bwt_at(row)
+            if char == "$":     # the row of the whole text, position 0
+                break
+            row = ranks[char] + occurrences[char][row]
+            position -= 1
+
+        samples.sort()
+        self.rows = array("I", [row for row, _ in samples])             # sampled rows, sorted
+        self.positions = array("I", [position for _, position in samples])
+
+    def nbytes(self) -> int:
+        """
+        Method to get the size of the samples in bytes
+        """
+        return self.rows.itemsize * len(self.rows) + self.positions.itemsize * len(self.positions)
+
+    def locate(self, row: int) -> int:
+        """
+        Text position of the suffix of a row
+
+        Time Complexity: O(sample_rate * log(N / sample_rate)) plus the occurrences queries of the LF-mapping steps
+
+        :param row: row of the bwt
+        :return: 0-indexed position in the text of the suffix of the row
+        """
+        bwt_at = self.bwt_at
+        ranks = self.fm_index.ranks
+        occurrences = self.fm_index.occurrences
+        rows = self.rows
+        steps = 0
+        while True:     # fewer than sample_rate iterations
+            i = bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                return self.positions[i] + steps
+            char = bwt_at(row)
+            row = ranks[char] + occurrences[char][row]
+            steps += 1
+
+
+def hdbwtpm_locate(fm_index: FMIndex, suffix_array: SampledSuffixArray, pat: str, max_d: int) -> list[list[int]]:
+    """
+    Hamming distance bwt pattern matching, returning where the matches occur instead of how many there are
+
+    :param fm_index: index of the bwt
+    :param suffix_array: sampled suffix array of the same bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] holds the sorted indices of where the matches with exactly d mismatches occur
+             (1-indexing)
+    """
+    output = [[] for _ in range(max_d + 1)]
+
+    def locate_band(sp, ep, mismatches):
+        output[mismatches].extend(suffix_array.locate(row) + 1 for row in range(sp, ep))
+
+    search_bands(fm_index, pat, max_d, locate_band)
+    for positions in output:
+        positions.sort()
+    return output
+
+
+def output_results(outputs: list, output_file: str) -> None:
+    """
+    Utility function to write output into output_file
+
+    :param outputs: results to output taken as a list of positions per distance
+    :param output_file: output file path/name
+    :return: None
+    """
+    f = open(output_file, "w")
+    for i in range(len(outputs)):
+        f.write(f"d = {i}, nMatches = {len(outputs[i])}, positions = {' '.join(map(str, outputs[i]))}\n")
+    f.close()
+
+
+if __name__ == "__main__":
+    # python locate.py <bwt file> <pattern file> <max_d> [suffix array sample rate]
+    _, filename1, filename2, max_d, *rest = sys.argv
+    index = FMIndex(read_file(filename1), DEFAULT_SAMPLE_RATE)
+    sampled = SampledSuffixArray(index, int(rest[0]) if rest else DEFAULT_SA_SAMPLE_RATE)
+    positions_per_d = hdbwtpm_locate(index, sampled, read_file(filename2), int(max_d))
+    output_results(positions_per_d, "output_hdbwtpm_locate.txt")
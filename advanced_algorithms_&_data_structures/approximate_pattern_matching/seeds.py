@@ -0,0 +1,236 @@
+from hdbwtpm import FMIndex, hdbwtpm_index, output_results, DEFAULT_SAMPLE_RATE
+from locate import SampledSuffixArray, get_bwt_reader, DEFAULT_SA_SAMPLE_RATE
+from utils import make_bwt, read_file
+import sys
+
+
+def split_pattern(m: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Utility function to split a pattern into consecutive pieces of lengths differing by at most 1
+
+    :param m: length of the pattern
+    :param parts: number of pieces
+    :return: list of (start, end) of the pieces, end exclusive
+    """
+    return [(m * k // parts, m * (k + 1) // parts) for k in range(parts)]
+
+
+def invert_bwt(fm_index: FMIndex) -> str:
+    """
+    Get the text of a bwt back by walking it backwards with LF-mapping from the row of the suffix "$"
+
+    Time Complexity: O(N) LF-mapping steps
+
+    :param fm_index: index of the bwt, built from the bwt string or loaded from a file
+    :return: text, without the terminating character "$"
+    """
+    bwt_at = get_bwt_reader(fm_index)
+    ranks = fm_index.ranks
+    occurrences = fm_index.occurrences
+    reversed_txt = []
+    row = 0
+    char = bwt_at(0) if fm_index.size else "$"
+    while char != "$":      # O(N)
+        reversed_txt.append(char)
+        row = ranks[char] + occurrences[char][row]
+        char = bwt_at(row)
+    return "".join(reversed(reversed_txt))
+
+
+class SeedIndex:
+    """
+    What the seed-and-extend search needs next to the FM index: a sampled suffix array to locate the seeds and the text
+    to verify the candidates
+    """
+
+    def __init__(self, fm_index: FMIndex, sa_sample_rate: int = DEFAULT_SA_SAMPLE_RATE):
+        """
+        Constructor method for the SeedIndex class
+
+        Time Complexity: O(N)
+
+        :param fm_index: index built from the bwt string
+        :param sa_sample_rate: sample rate of the suffix array
+        """
+        self.fm_index = fm_index
+        self.suffix_array = SampledSuffixArray(fm_index, sa_sample_rate)
+        self.txt = invert_bwt(fm_index)
+
+
+def hdbwtpm_seeds(seed_index: SeedIndex, pat: str, max_d: int) -> list[int]:
+    """
+    Pigeonhole seed-and-extend hamming distance pattern matching. A match with at most max_d mismatches has at least one
+    of max_d + 1 pieces of the pattern without any mismatch, so the pieces are found exactly with the backward search,
+    each occurrence gives one candidate alignment, and the candidates are verified against the text.
+
+    Time Complexity: O(m * max_d) exact backward search steps, plus O(m) per candidate
+
+    :param seed_index: index of the bwt with its sampled suffix array and text
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] is the number of matches with exactly d mismatches
+    """
+    fm_index = seed_index.fm_index
+    m = len(pat)
+    if max_d < 0:
+        return []
+    if m < max_d + 1:   # some pieces would be empty and match everywhere
+        return hdbwtpm_index(fm_index, pat, max_d)
+
+    ranks = fm_index.ranks
+    occurrences = fm_index.occurrences
+    txt = seed_index.txt
+    locate = seed_index.suffix_array.locate
+
+    candidates = set()
+    for start, end in split_pattern(m, max_d + 1):
+        sp, ep = 0, fm_index.size
+        for char in reversed(pat[start:end]):   # exact backward search of the seed
+            if char not in ranks:
+                sp = ep
+                break
+            sp = ranks[char] + occurrences[char][sp]
+            ep = ranks[char] + occurrences[char][ep]
+            if ep <= sp:
+                break
+        for row in range(sp, ep):
+            shift = locate(row) - start
+            if 0 <= shift <= len(txt) - m:
+                candidates.add(shift)
+
+    output = [0 for _ in range(max_d + 1)]
+    for shift in candidates:    # verification, stopping at max_d + 1 mismatches
+        mismatches = 0
+        for i in range(m):
+            if txt[shift + i] != pat[i]:
+                mismatches += 1
+                if mismatches > max_d:
+                    break
+        else:
+            output[mismatches] += 1
+    return output
+
+
+class BidirectionalIndex:
+    """
+    Bidirectional FM index (2BWT): the index of the text and the index of the reversed text. A string is represented by
+    its band [i, i + size) in the first and the band [j, j + size) of its reverse in the second, and both bands can be
+    kept in sync while the string is extended by a character on either side.
+    """
+
+    def __init__(self, bwt: str, sample_rate: int = DEFAULT_SAMPLE_RATE):
+        """
+        Constructor method for the BidirectionalIndex class
+
+        Time Complexity: O(N log^2 N) to build the bwt of the reversed text
+
+        :param bwt: bwt string
+        :param sample_rate: sample rate of the occurrences of both indexes
+        """
+        self.forward = FMIndex(bwt, sample_rate)
+        self.reverse = FMIndex(make_bwt(invert_bwt(self.forward)[::-1] + "$"), sample_rate)
+        self.size = self.forward.size
+        self.alphabet = self.forward.alphabet
+        self.dollar_rows = (bwt.find("$"), self.reverse.bwt.find("$"))     # row preceded by "$" in each index
+
+    def extensions(self, i: int, j: int, size: int, left: bool) -> list[tuple[str, int, int, int]]:
+        """
+        Extend the string of a pair of bands by every character of the alphabet, on the left (searching the index of the
+        text) or on the right (searching the index of the reversed text). In the other index, the rows of the extended
+        strings are ordered by the extending character, after the row of the string preceded by "$" if there is one.
+
+        Time Complexity: O(|A|) occurrences queries
+
+        :param i: start of the band of the string in the index of the text
+        :param j: start of the band of the reversed string in the index of the reversed text
+        :param size: size of both bands
+        :param left: extend on the left, otherwise on the right
+        :return: list of (character, i, j, size) of the non-empty extensions
+        """
+        if left:
+            searched, start, other = self.forward, i, j
+            dollar_row = self.dollar_rows[0]
+        else:
+            searched, start, other = self.reverse, j, i
+            dollar_row = self.dollar_rows[1]
+
+        ranks = searched.ranks
+        occurrences = searched.occurrences
+        offset = other + (start <= dollar_row < start + size)
+        result = []
+        for char in self.alphabet:  # the alphabet is in increasing order
+            top = occurrences[char][start]
+            count = occurrences[char][start + size] - top
+            if count:
+                if left:
+                    result.append((char, ranks[char] + top, offset, count))
+                else:
+                    result.append((char, offset, ranks[char] + top, count))
+            offset += count
+        return result
+
+
+def hdbwtpm_bidirectional(bi_index: BidirectionalIndex, pat: str, max_d: int) -> list[int]:
+    """
+    Hamming distance pattern matching with a search scheme over the bidirectional index. The pattern is split into
+    max_d + 1 pieces and search s starts from piece s, which must match exactly, extends to the right until the end of
+    the pattern, then to the left until its start. A match is only accepted by the search of its leftmost exact piece,
+    by requiring at least one mismatch in every piece left of s, so each match is counted exactly once and a branch is
+    pruned as soon as those pieces cannot all get their mismatch within the budget.
+
+    :param bi_index: bidirectional index of the bwt
+    :param pat: pattern to be matched
+    :param max_d: maximum number of mismatches allowed (hamming distance)
+    :return: list where output[d] is the number of matches with exactly d mismatches
+    """
+    m = len(pat)
+    if max_d < 0:
+        return []
+    if m < max_d + 1:   # some pieces would be empty
+        return hdbwtpm_index(bi_index.forward, pat, max_d)
+
+    pieces = split_pattern(m, max_d + 1)
+    output = [0 for _ in range(max_d + 1)]
+    for s, (piece_start, _) in enumerate(pieces):
+        # steps of the search: (position, extend left, exact, piece left of s, last step of its piece, left pieces after)
+        steps = []
+        for k in range(s, len(pieces)):
+            for position in range(*pieces[k]):
+                steps.append((position, False, k == s, False, position == pieces[k][1] - 1, s))
+        for k in range(s - 1, -1, -1):
+            for position in range(pieces[k][1] - 1, pieces[k][0] - 1, -1):
+                steps.append((position, True, False, True, position == pieces[k][0], k))
+
+        stack = [(0, 0, bi_index.size, 0, 0, 0)]   # bands, step, mismatches, mismatches in the current piece
+        while stack:
+            i, j, size, step, mismatches, piece_mismatches = stack.pop()
+            position, left, exact, left_piece, last, pieces_after = steps[step]
+            for char, ci, cj, csize in bi_index.extensions(i, j, size, left):
+                mismatch = char != pat[position]
+                if mismatch and exact:
+                    continue
+                child_mismatches = mismatches + mismatch
+                child_piece_mismatches = piece_mismatches + mismatch
+                if left_piece and last and child_piece_mismatches == 0:
+                    continue
+                # every left piece still ahead needs a mismatch, and the current one too if it has none yet
+                needed = pieces_after + (left_piece and not last and child_piece_mismatches == 0)
+                if child_mismatches + needed > max_d:
+                    continue
+                if step + 1 == len(steps):
+                    output[child_mismatches] += csize
+                else:
+                    stack.append((ci, cj, csize, step + 1, child_mismatches, 0 if last else child_piece_mismatches))
+    return output
+
+
+if __name__ == "__main__":
+    # python seeds.py <bwt file> <pattern file> <max_d> [seeds|bidirectional]
+    _, filename1, filename2, max_d, *rest = sys.argv
+    bwt_str = read_file(filename1)
+    pat_str = read_file(filename2)
+    if rest and rest[0] == "bidirectional":
+        nMatches = hdbwtpm_bidirectional(BidirectionalIndex(bwt_str), pat_str, int(max_d))
+    else:
+        nMatches = hdbwtpm_seeds(SeedIndex(FMIndex(bwt_str)), pat_str, int(max_d))
+    output_results(nMatches, "output_hdbwtpm.txt")
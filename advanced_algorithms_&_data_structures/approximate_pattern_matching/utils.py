@@ -25,3 +25,29 @@ def read_file(file_path: str) -> str:
     line = f.readline()
     f.close()
     return line
+
+
+def make_bwt(txt: str) -> str:
+    """
+    Utility function to get the bwt of a text terminated by "$", from a suffix array built by prefix doubling
+
+    Time Complexity: O(n log^2 n)
+
+    :param txt: text ending with the terminating character "$"
+    :return: bwt of the text
+    """
+    n = len(txt)
+    rank = [ord(char) for char in txt]
+    suffix_arr = list(range(n))
+    k = 1
+    while True:
+        key = lambda i: (rank[i], rank[i + k] if i + k < n else -1)
+        suffix_arr.sort(key=key)
+        new_rank = [0] * n
+        for j in range(1, n):
+            new_rank[suffix_arr[j]] = new_rank[suffix_arr[j - 1]] + (key(suffix_arr[j]) != key(suffix_arr[j - 1]))
+        rank = new_rank
+        if rank[suffix_arr[-1]] == n - 1:
+            break
+        k *= 2
+    return "".join(txt[i - 1] for i in suffix_arr)
@@ -0,0 +1,123 @@
+from array import array
+from typing import BinaryIO
+from utils import NO_OF_CHARS, char2index, index2char, read_file
+import sys
+
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+
+def first_occurrence_offsets(bwt: str) -> array:
+    """
+    Get the C array of a bwt, where offsets[i] is the row at which the character of index i first appears in the sorted
+    first column, for every character including the terminating character '$'. Unlike the get_rank of hdbwtpm, which
+    leaves '$' out and maps characters to rows, it is indexed by char2index and holds one more row, N, so the rows of
+    character i are offsets[i] to offsets[i + 1] - 1.
+
+    Time Complexity: O(N)
+
+    :param bwt: bwt string, of characters between '$' and '~'
+    :return: uint32 array of NO_OF_CHARS + 1 rows, the last one being N
+    """
+    counts = [0 for _ in range(NO_OF_CHARS)]
+    for char in bwt:
+        c = char2index(char)
+        if not 0 <= c < NO_OF_CHARS:    # a negative index would silently count the character in the wrong bucket
+            raise ValueError(f"character {char!r} of the bwt is outside of the alphabet")
+        counts[c] += 1
+
+    offsets = array("I", [0])
+    for count in counts:
+        offsets.append(offsets[-1] + count)
+    return offsets
+
+
+def get_successors(bwt: str, offsets: array) -> array:
+    """
+    Get the inverse of the LF-mapping of a bwt. LF-mapping sends row i to offsets[bwt[i]] + occurrences of bwt[i] in
+    bwt[:i], the row of the suffix one position earlier in the text, so the occurrences are counted on the fly during a
+    single pass and successors[j] is the row of the suffix one position later than the suffix of row j.
+
+    Time Complexity: O(N)
+
+    :param bwt: bwt string
+    :param offsets: C array of the bwt, see first_occurrence_offsets
+    :return: uint32 array of N rows
+    """
+    successors = array("I", bytes(4 * len(bwt)))
+    next_row = array("I", offsets)  # offsets[c] + occurrences of c seen so far
+    for i, char in enumerate(bwt):
+        c = char2index(char)
+        successors[next_row[c]] = i
+        next_row[c] += 1
+    return successors
+
+
+def get_first_column(offsets: array) -> bytes:
+    """
+    Get the sorted first column of a bwt from its C array
+
+    Time Complexity: O(N)
+
+    :param offsets: C array of the bwt, see first_occurrence_offsets
+    :return: latin-1 first column
+    """
+    return b"".join(index2char(i).encode("latin-1") * (offsets[i + 1] - offsets[i]) for i in range(NO_OF_CHARS))
+
+
+def inverse_bwt(bwt: str, f: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """
+    Recover the text of a bwt and stream it to a binary stream, block_size bytes at a time. The text is walked forwards
+    from its first suffix, the row whose bwt character is '$', by following the inverse LF-mapping, and the first column
+    gives the character at the start of each suffix, so no reversed copy of the text is ever built. Apart from the
+    bwt, the memory used is 5 bytes per character and the block.
+
+    Time Complexity: O(N)
+
+    :param bwt: bwt string, of characters between '$' and '~' with exactly one terminating character '$'
+    :param f: binary stream opened for writing
+    :param block_size: number of bytes written at a time
+    :return: number of characters written, terminating character '$' included
+    """
+    if block_size < 1:
+        raise ValueError(f"block size must be at least 1, got {block_size}")
+    if bwt.count("$") != 1:
+        raise ValueError("the bwt must contain exactly one terminating character '$'")
+
+    offsets = first_occurrence_offsets(bwt)
+    successors = get_successors(bwt, offsets)
+    first = get_first_column(offsets)
+
+    block = bytearray(block_size)
+    row = bwt.index("$")    # the row of the whole text
+    written = 0
+    while written < len(bwt):   # O(N)
+        size = min(block_size, len(bwt) - written)
+        for k in range(size):
+            block[k] = first[row]
+            row = successors[row]
+        f.write(block if size == block_size else block[:size])
+        written += size
+    return written
+
+
+def output_results(bwt: str, output_file: str, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+    """
+    Utility function to write the text of a bwt into output_file
+
+    :param bwt: bwt string
+    :param output_file: output file path/name
+    :param block_size: number of bytes written at a time
+    :return: None
+    """
+    f = open(output_file, "wb")
+    inverse_bwt(bwt, f, block_size)
+    f.close()
+
+
+if __name__ == "__main__":
+    # python inversebwt.py <bwt file> [block size]
+    _, filename1, *rest = sys.argv
+    bwt_str = read_file(filename1)
+    if bwt_str.endswith("\n"):    # newline added by the editor which saved the file
+        bwt_str = bwt_str[:-1]
+    output_results(bwt_str, "output_inversebwt.txt", int(rest[0]) if rest else DEFAULT_BLOCK_SIZE)
@@ -0,0 +1,274 @@
+from array import array
+from collections import deque
+from typing import Iterator
+from utils import get_table_index, read_file, output_results, NO_OF_CHARS, OTHER_CHAR_INDEX
+import struct
+import sys
+
+MAGIC = b"ACAU"
+FORMAT_VERSION = 2
+# one column per character of the alphabet, plus OTHER_CHAR_INDEX for every character outside of it
+ALPHABET_SIZE = NO_OF_CHARS + 1
+HEADER = struct.Struct("<4sIIIIB")      # magic, version, alphabet size, number of states, number of patterns, little endian
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton matching a whole dictionary of patterns in one pass over the text. The transitions of the
+    automaton are completed into a full DFA over the alphabet of get_table_index and every table is a flat array, so
+    the automaton can be written to a file and loaded back without rebuilding it. Every character outside of the
+    alphabet shares the column OTHER_CHAR_INDEX, so the automaton cannot tell them apart, and the hits of the patterns
+    holding such characters are compared against the text before being reported.
+
+    Tables, for a state s and a character index c:
+        goto[s * ALPHABET_SIZE + c]: next state
+        fail[s]: state of the longest proper suffix of s which is also a prefix of a pattern
+        output[s]: first state on the failure chain of s (s included) where a pattern ends, -1 if none
+        out_link[s]: next state after s on the failure chain where a pattern ends, -1 if none
+        pattern_of[s]: index of the pattern ending at s, -1 if none
+        verified[s]: indices of the patterns holding characters outside of the alphabet which end at s
+    """
+
+    def __init__(self, pats: list[str] = None):
+        """
+        Constructor method for the AhoCorasick class, building the automaton of the patterns
+
+        Time Complexity: O(|A| * M) where |A| is the size of the alphabet and M is the total length of the patterns
+
+        :param pats: patterns to be matched, of any characters, duplicates and empty patterns are ignored
+        """
+        self.patterns = [pat for pat in dict.fromkeys(pats or []) if pat]
+        self.goto = array("i")
+        self.fail = array("i")
+        self.output = array("i")
+        self.out_link = array("i")
+        self.pattern_of = array("i")
+        self.verified = {}      # state -> indices of the patterns ending there whose hits are compared against the text
+        if pats is not None:
+            self.build()
+
+    def mark_verified(self) -> None:
+        """
+        Helper method to find the patterns holding characters outside of the alphabet, whose hits must be verified, and
+        the state where each of them ends. Such patterns differing only by those characters end at the same state, so a
+        state can have several of them.
+
+        Time Complexity: O(M) where M is the total length of the patterns
+        """
+        goto = self.goto
+        self.verified = {}
+        for index, pat in enumerate(self.patterns):     # loop scales with the total length of the patterns
+            char_indices = [get_table_index(char) for char in pat]
+            if OTHER_CHAR_INDEX in char_indices:
+                state = 0
+                for char_index in char_indices:     # the path of the pattern in the trie, kept by the DFA
+                    state = goto[state * ALPHABET_SIZE + char_index]
+                self.verified.setdefault(state, []).append(index)
+
+    def new_state(self) -> int:
+        """
+        Helper method to append a state with no transitions
+
+        :return: the new state
+        """
+        self.goto.extend(array("i", [-1]) * ALPHABET_SIZE)
+        self.pattern_of.append(-1)
+        return len(self.pattern_of) - 1
+
+    def build(self) -> None:
+        """
+        Build the trie of the patterns, then complete it into a DFA in breadth-first order, where a missing transition
+        of a state is the transition of its failure state, which is shallower and so already complete
+        """
+        goto = self.goto
+        root = self.new_state()
+
+        # trie of the patterns
+        for index, pat in enumerate(self.patterns):     # loop scales with the total length of the patterns
+            state = root
+            for char in pat:
+                char_index = get_table_index(char)
+                if goto[state * ALPHABET_SIZE + char_index] == -1:
+                    goto[state * ALPHABET_SIZE + char_index] = self.new_state()
+                state = goto[state * ALPHABET_SIZE + char_index]
+            self.pattern_of[state] = index
+        self.mark_verified()
+
+        size = len(self.pattern_of)
+        fail = self.fail = array("i", [0]) * size
+        output = self.output = array("i", [-1]) * size
+        out_link = self.out_link = array("i", [-1]) * size
+        pattern_of = self.pattern_of
+
+        queue = deque()
+        for char_index in range(ALPHABET_SIZE):
+            child = goto[char_index]
+            if child == -1:
+                goto[char_index] = root
+            else:
+                queue.append(child)
+
+        while queue:    # each state is visited once, and each visit loops over the alphabet
+            state = queue.popleft()
+            out_link[state] = output[fail[state]]
+            output[state] = state if pattern_of[state] != -1 else out_link[state]
+            for char_index in range(ALPHABET_SIZE):
+                child = goto[state * ALPHABET_SIZE + char_index]
+                fallback = goto[fail[state] * ALPHABET_SIZE + char_index]
+                if child == -1:
+                    goto[state * ALPHABET_SIZE + char_index] = fallback
+                else:
+                    fail[child] = fallback
+                    queue.append(child)
+
+    def finditer(self, txt: str) -> Iterator[tuple[int, int]]:
+        """
+        Scan the text once, yielding every occurence of every pattern. Characters outside of the alphabet all follow
+        the OTHER_CHAR_INDEX transition, and the hits of the patterns holding such characters are compared against the
+        text.
+
+        Time Complexity: O(n + z) where z is the number of matches, plus O(m) per hit of a verified pattern
+
+        :param txt: main string to search through
+        :return: generator of (pattern index, index of where the match occurs (1-indexing))
+        """
+        goto = self.goto
+        output = self.output
+        out_link = self.out_link
+        pattern_of = self.pattern_of
+        patterns = self.patterns
+        verified = self.verified
+        lengths = [len(pat) for pat in patterns]
+
+        state = 0
+        for j, code in enumerate(map(ord, txt)):    # loop scales with n
+            char_index = code - 33                  # get_table_index, inlined
+            if not 0 <= char_index < NO_OF_CHARS:
+                char_index = OTHER_CHAR_INDEX
+            state = goto[state * ALPHABET_SIZE + char_index]
+
+            hit = output[state]
+            while hit != -1:    # loop scales with the number of patterns ending at j
+                if hit in verified:
+                    for index in verified[hit]:
+                        start = j - lengths[index] + 1
+                        if txt.startswith(patterns[index], start):
+                            yield index, start + 1
+                else:
+                    index = pattern_of[hit]
+                    yield index, j - lengths[index] + 2
+                hit = out_link[hit]
+
+    def search(self, txt: str) -> dict[str, list[int]]:
+        """
+        Search the text for every pattern of the dictionary
+
+        Time Complexity: O(n + z) where z is the number of matches
+
+        :param txt: main string to search through
+        :return: dictionary mapping each pattern to the indices of where its matches occur (1-indexing)
+        """
+        matches = {pat: [] for pat in self.patterns}
+        for index, position in self.finditer(txt):
+            matches[self.patterns[index]].append(position)
+        for positions in matches.values():      # patterns ending at the same j are reported in suffix order
+            positions.sort()
+        return matches
+
+    def save(self, file_path: str) -> None:
+        """
+        Write the automaton to a file, as a header followed by the raw tables and the patterns
+
+        :param file_path: file path
+        :return: None
+        """
+        encoded = [pat.encode("utf-8") for pat in self.patterns]
+        pattern_lengths = array("i", [len(pat) for pat in encoded])
+        tables = [self.goto, self.fail, self.output, self.out_link, self.pattern_of, pattern_lengths]
+        if sys.byteorder != "little":   # the file is always little endian
+            tables = [array("i", table) for table in tables]
+            for table in tables:
+                table.byteswap()
+
+        f = open(file_path, "wb")
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, ALPHABET_SIZE, len(self.pattern_of), len(self.patterns), 1))
+        for table in tables:
+            table.tofile(f)
+        f.write(b"".join(encoded))
+        f.close()
+
+    @classmethod
+    def load(cls, file_path: str) -> "AhoCorasick":
+        """
+        Read an automaton written by save, without rebuilding it
+
+        Time Complexity: O(size of the file)
+
+        :param file_path: file path
+        :return: the loaded automaton
+        """
+        with open(file_path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{file_path} is not a version {FORMAT_VERSION} Aho-Corasick automaton file")
+            magic, version, alphabet_size, size, no_of_patterns, little_endian = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION or alphabet_size != ALPHABET_SIZE:
+                raise ValueError(f"{file_path} is not a version {FORMAT_VERSION} Aho-Corasick automaton file")
+            if little_endian != 1:
+                raise ValueError(f"{file_path}: unsupported byte order flag {little_endian}")
+
+            counts = (size * ALPHABET_SIZE, size, size, size, size, no_of_patterns)
+            data = f.read()
+
+        # the tables and the pattern lengths must be there before any of them is read, the patterns after them
+        tables_size = 4 * sum(counts)
+        if len(data) < tables_size:
+            raise ValueError(f"{file_path}: truncated Aho-Corasick automaton, {HEADER.size + len(data)} bytes instead "
+                             f"of at least {HEADER.size + tables_size}")
+
+        automaton = cls()
+        tables = []
+        offset = 0
+        for count in counts:
+            table = array("i", data[offset:offset + 4 * count])
+            if sys.byteorder != "little":
+                table.byteswap()
+            tables.append(table)
+            offset += 4 * count
+        automaton.goto, automaton.fail, automaton.output, automaton.out_link, automaton.pattern_of, pattern_lengths = tables
+
+        if len(data) < tables_size + sum(pattern_lengths):
+            raise ValueError(f"{file_path}: truncated Aho-Corasick automaton, {HEADER.size + len(data)} bytes instead "
+                             f"of {HEADER.size + tables_size + sum(pattern_lengths)}")
+        for length in pattern_lengths:
+            automaton.patterns.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+        automaton.mark_verified()
+        return automaton
+
+
+def read_patterns(file_path: str) -> list[str]:
+    """
+    Utility function to read a dictionary file with one pattern per line
+
+    :param file_path: file path
+    :return: patterns
+    """
+    f = open(file_path, "r")
+    pats = f.read().splitlines()
+    f.close()
+    return pats
+
+
+if __name__ == "__main__":
+    # python ahocorasick.py <text file> <dictionary file or .aca automaton file> [automaton file to save]
+    _, filename1, filename2, *rest = sys.argv
+    txt_str = read_file(filename1)
+    if filename2.endswith(".aca"):
+        dictionary = AhoCorasick.load(filename2)
+    else:
+        dictionary = AhoCorasick(read_patterns(filename2))
+    if rest:
+        dictionary.save(rest[0])
+    matching_ids = sorted((position, dictionary.patterns[index]) for index, position in dictionary.finditer(txt_str))
+    output_results([f"{position} {pat}" for position, pat in matching_ids], "output_ahocorasick.txt")
@@ -0,0 +1,163 @@
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from os import walk
+from os.path import isdir, join, realpath
+from time import perf_counter
+from ahocorasick import AhoCorasick
+from stricterBM import CompiledPattern
+from utils import as_byte_view, as_pattern_bytes, output_results
+import sys
+
+BATCH_ENGINES = ("boyer_moore", "ahocorasick")
+DEFAULT_FILES_PER_TASK = 16
+
+matcher = None      # preprocessed patterns of a worker process, set once per worker by init_worker
+
+
+def list_files(target: str, exclude: str = None) -> list[str]:
+    """
+    Utility function to list the files to search, every file under a directory or every file matching a glob pattern
+
+    :param target: directory path, or glob pattern where "**" matches any number of subdirectories
+    :param exclude: path of a file to leave out, such as the output file, which is truncated while the files are searched
+    :return: sorted file paths
+    """
+    if isdir(target):
+        files = [join(root, name) for root, _, names in walk(target) for name in names]
+    else:
+        files = [path for path in glob(target, recursive=True) if not isdir(path)]
+    if exclude is not None:
+        excluded = realpath(exclude)
+        files = [path for path in files if realpath(path) != excluded]
+    return sorted(files)
+
+
+def read_batch_patterns(file_path: str) -> list[str]:
+    """
+    Utility function to read a dictionary file with one pattern per line, decoded as latin-1 like the files searched, so
+    that a pattern matches the bytes it was written with whatever the encoding of the files
+
+    :param file_path: file path
+    :return: patterns, with one character per byte
+    """
+    f = open(file_path, "rb")
+    pats = f.read().decode("latin-1").splitlines()
+    f.close()
+    return pats
+
+
+def check_patterns(pats: list[str]) -> list[str]:
+    """
+    Utility function to check and normalise the patterns of a batch the same way for every engine. The files are
+    searched as latin-1, so a pattern holding a character above U+00FF could never match and is rejected, duplicates
+    and empty patterns are dropped.
+
+    :param pats: patterns to be matched
+    :return: distinct non-empty patterns, in their original order
+    """
+    for pat in pats:
+        if any(ord(char) > 0xFF for char in pat):
+            raise ValueError(f"pattern {pat!r} holds characters outside of latin-1, read the patterns as latin-1 bytes")
+    return [pat for pat in dict.fromkeys(pats) if pat]
+
+
+def compile_matcher(pats: list[str], engine: str = "boyer_moore"):
+    """
+    Preprocess the patterns once for the whole batch, either as one Boyer-Moore CompiledPattern per pattern or as a
+    single Aho-Corasick automaton for the whole set
+
+    :param pats: patterns to be matched, see check_patterns
+    :param engine: one of BATCH_ENGINES
+    :return: list of CompiledPattern of the bytes of the patterns, or AhoCorasick automaton
+    """
+    if engine not in BATCH_ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {BATCH_ENGINES}")
+    pats = check_patterns(pats)
+    if engine == "ahocorasick":
+        return AhoCorasick(pats)
+    return [CompiledPattern(as_pattern_bytes(pat)) for pat in pats]
+
+
+def init_worker(compiled) -> None:
+    """
+    Initializer of the worker processes, which receive the preprocessed patterns once instead of with every file
+
+    :param compiled: result of compile_matcher
+    :return: None
+    """
+    global matcher
+    matcher = compiled
+
+
+def search_file(file_path: str) -> tuple[str, int, list[tuple[int, int]]]:
+    """
+    Worker function to search one file with the preprocessed patterns of the worker. Boyer-Moore searches the raw bytes
+    of the file, Aho-Corasick searches them decoded as latin-1 so that every byte is one character.
+
+    :param file_path: file path
+    :return: tuple of the file path, its size in bytes and its (index of where the match occurs (1-indexing), pattern
+             index) pairs, sorted
+    """
+    f = open(file_path, "rb")
+    data = f.read()
+    f.close()
+
+    if isinstance(matcher, AhoCorasick):
+        matches = [(position, index) for index, position in matcher.finditer(data.decode("latin-1"))]
+    else:
+        view = as_byte_view(data)
+        matches = [(position, index) for index, compiled in enumerate(matcher) for position in compiled.finditer(view)]
+    matches.sort()
+    return file_path, len(data), matches
+
+
+def batch_search(target: str, pats: list[str], output_file: str, engine: str = "boyer_moore", workers: int = None,
+                 files_per_task: int = DEFAULT_FILES_PER_TASK) -> dict:
+    """
+    Search every file of a directory or glob for a set of patterns. The patterns are preprocessed once and handed to
+    each worker process when it starts, the files are fanned out to the pool in tasks of files_per_task files, and the
+    results are streamed to a single output file in file order as the tasks complete, one "<file> <position>" line per
+    match, followed by the pattern when there are several. The output file itself is never searched.
+
+    :param target: directory path or glob pattern of the files to search
+    :param pats: patterns to be matched, as read by read_batch_patterns, see check_patterns
+    :param output_file: output file path/name
+    :param engine: one of BATCH_ENGINES
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param files_per_task: number of files sent to a worker at a time
+    :return: report with the number of files, bytes and matches, the wall time, and the files and bytes per second
+    """
+    start = perf_counter()
+    files = list_files(target, exclude=output_file)
+    compiled = compile_matcher(pats, engine)
+    patterns = compiled.patterns if isinstance(compiled, AhoCorasick) else [c.pat.decode("latin-1") for c in compiled]
+    # the patterns hold the raw bytes of the pattern file, write them back as they were typed
+    patterns = [pat.encode("latin-1").decode("utf-8", "replace") for pat in patterns]
+    report = {"files": 0, "bytes": 0, "matches": 0}
+
+    def lines():
+        for file_path, size, matches in executor.map(search_file, files, chunksize=files_per_task):
+            report["files"] += 1
+            report["bytes"] += size
+            report["matches"] += len(matches)
+            for position, index in matches:
+                yield f"{file_path} {position} {patterns[index]}" if len(patterns) > 1 else f"{file_path} {position}"
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(compiled,)) as executor:
+        output_results(lines(), output_file)
+
+    seconds = perf_counter() - start
+    report["seconds"] = seconds
+    report["files_per_second"] = report["files"] / seconds
+    report["bytes_per_second"] = report["bytes"] / seconds
+    return report
+
+
+if __name__ == "__main__":
+    # python batch.py <directory or glob> <pattern file, one pattern per line> [engine] [workers]
+    _, target_path, filename, *rest = sys.argv
+    engine_name = rest[0] if rest else "boyer_moore"
+    no_of_workers = int(rest[1]) if len(rest) > 1 else None
+    totals = batch_search(target_path, read_batch_patterns(filename), "output_batch.txt", engine_name, no_of_workers)
+    print(f"{totals['files']} files, {totals['bytes']} bytes, {totals['matches']} matches in {totals['seconds']:.3f}s: "
+          f"{totals['files_per_second']:.1f} files/s, {totals['bytes_per_second'] / 1e6:.2f} MB/s")
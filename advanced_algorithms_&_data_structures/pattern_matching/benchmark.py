@@ -0,0 +1,397 @@
+from time import perf_counter
+from timeit import repeat
+import json
+import platform
+import tracemalloc
+from random import Random
+from utils import NO_OF_CHARS
+from bitwisepm import bitwisepm, bitwisepm_int, bitwisepm_many
+from horspool import horspool, sunday
+from search import choose_engine
+from stricterBM import boyer_moore, extended_bad_character, good_suffix, compact_bad_character, compact_good_suffix, \
+    rarest_character
+import sys
+
+
+def random_text(size: int, alphabet_size: int = NO_OF_CHARS, seed: int = 0) -> str:
+    """
+    Utility function to generate a random text over the first alphabet_size characters of the ASCII range [33, 126]
+
+    :param size: length of the text
+    :param alphabet_size: number of distinct characters to draw from
+    :param seed: seed of the random number generator so that runs are reproducible
+    :return: random text
+    """
+    rng = Random(seed)
+    alphabet = [chr(33 + i) for i in range(alphabet_size)]
+    return "".join(rng.choices(alphabet, k=size))
+
+
+# relative frequencies of the letters a-z in English text
+ENGLISH_LETTER_FREQUENCIES = [8.2, 1.5, 2.8, 4.3, 12.7, 2.2, 2.0, 6.1, 7.0, 0.15, 0.77, 4.0, 2.4,
+                              6.7, 7.5, 1.9, 0.095, 6.0, 6.3, 9.1, 2.8, 0.98, 2.4, 0.15, 2.0, 0.074]
+
+
+def dna_text(size: int, seed: int = 0) -> str:
+    """
+    Utility function to generate a DNA-like text over the alphabet {A, C, G, T}
+
+    :param size: length of the text
+    :param seed: seed of the random number generator
+    :return: random DNA-like text
+    """
+    rng = Random(seed)
+    return "".join(rng.choices("ACGT", k=size))
+
+
+def english_text(size: int, seed: int = 0) -> str:
+    """
+    Utility function to generate an English-like text. A vocabulary of words is drawn with English letter frequencies and
+    the words are then used with Zipf-distributed frequencies. Words are separated by "_" since the space character is
+    outside of the alphabet of get_char_index.
+
+    :param size: length of the text
+    :param seed: seed of the random number generator
+    :return: random English-like text
+    """
+    rng = Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choices(letters, ENGLISH_LETTER_FREQUENCIES, k=rng.randint(1, 10))) for _ in range(2000)]
+    zipf_weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    words = []
+    length = 0
+    while length < size:
+        words.extend(rng.choices(vocabulary, zipf_weights, k=1024))
+        length = sum(len(word) + 1 for word in words)
+    return "_".join(words)[:size]
+
+
+def periodic_text(size: int, seed: int = 0) -> str:
+    """
+    Utility function to generate the periodic worst case text a^n, where every position is a match for a^m
+
+    :param size: length of the text
+    :param seed: unused, kept so that every corpus generator has the same signature
+    :return: a^n
+    """
+    return "a" * size
+
+
+CORPORA = {
+    "dna": (dna_text, 4),
+    "english": (english_text, 27),
+    "periodic": (periodic_text, 1),
+    "printable": (random_text, NO_OF_CHARS),
+}
+
+
+def naive_search(txt: str, pat: str) -> list[int]:
+    """
+    Naive baseline matcher, checking every alignment of the pattern against the text
+
+    Time Complexity: O(m * n)
+
+    :param txt: main string to search through
+    :param pat: pattern string to be matched against the main string txt
+    :return: indices of where the matches occur (1-indexing)
+    """
+    return [i + 1 for i in range(len(txt) - len(pat) + 1) if txt.startswith(pat, i)]
+
+
+SUITE_ENGINES = {
+    "naive": naive_search,
+    "boyer_moore": boyer_moore,
+    "bitwisepm": bitwisepm,
+    "bitwisepm_int": bitwisepm_int,
+    "horspool": horspool,
+    "sunday": sunday,
+}
+
+
+def run_suite(txt_sizes: list[int], pat_sizes: list[int], runs: int = 3, seed: int = 0) -> dict:
+    """
+    Time every engine of SUITE_ENGINES on every corpus of CORPORA for every combination of text and pattern size. The
+    patterns are taken from the middle of the text, so that there is at least one match. The outputs of the engines are
+    checked against the naive baseline.
+
+    :param txt_sizes: lengths of the generated texts
+    :param pat_sizes: lengths of the patterns
+    :param runs: number of timed runs per measurement, the best one is kept
+    :param seed: seed of the corpus generators
+    :return: report with one result per (corpus, n, m, engine)
+    """
+    results = []
+    for corpus, (generate, alphabet_size) in CORPORA.items():
+        for n in txt_sizes:
+            txt = generate(n, seed=seed)
+            for m in pat_sizes:
+                if m > n:
+                    continue
+                pat = txt[n // 2: n // 2 + m]
+                expected = naive_search(txt, pat)
+                for engine, search in SUITE_ENGINES.items():
+                    results.append({
+                        "corpus": corpus,
+                        "alphabet_size": alphabet_size,
+                        "n": n,
+                        "m": m,
+                        "engine": engine,
+                        "seconds": time_engine(search, txt, pat, runs),
+                        "matches": len(expected),
+                        "correct": search(txt, pat) == expected,
+                    })
+
+    return {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+
+def write_report(report: dict, output_file: str) -> None:
+    """
+    Utility function to write a benchmark report as JSON
+
+    :param report: report produced by run_suite
+    :param output_file: output file path/name
+    :return: None
+    """
+    f = open(output_file, "w")
+    json.dump(report, f, indent=2)
+    f.close()
+
+
+def find_regressions(baseline: dict, report: dict, tolerance: float = 1.25) -> list[dict]:
+    """
+    Compare a report against a baseline report and list the measurements which got slower by more than the tolerance
+    factor, or which no longer produce the correct matches
+
+    :param baseline: earlier report produced by run_suite
+    :param report: new report produced by run_suite
+    :param tolerance: allowed slowdown factor before a measurement counts as a regression
+    :return: regressed results of the new report, each with the baseline time added
+    """
+    key = lambda result: (result["corpus"], result["n"], result["m"], result["engine"])
+    previous = {key(result): result for result in baseline["results"]}
+
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        if not result["correct"] or result["seconds"] > old["seconds"] * tolerance:
+            regressions.append({**result, "baseline_seconds": old["seconds"]})
+    return regressions
+
+
+def best_engines(report: dict) -> dict[str, str]:
+    """
+    Pick the fastest correct engine for each workload of a report
+
+    :param report: report produced by run_suite
+    :return: dictionary mapping "corpus/n/m" to the name of the fastest engine
+    """
+    best = {}
+    for result in report["results"]:
+        if not result["correct"]:
+            continue
+        workload = f"{result['corpus']}/{result['n']}/{result['m']}"
+        if workload not in best or result["seconds"] < best[workload]["seconds"]:
+            best[workload] = result
+    return {workload: result["engine"] for workload, result in best.items()}
+
+
+def time_engine(engine, txt: str, pat: str, runs: int = 3) -> float:
+    """
+    Utility function to time a matcher, taking the best of several runs to reduce noise
+
+    :param engine: matcher taking (txt, pat)
+    :param txt: main string to search through
+    :param pat: pattern string to be matched
+    :param runs: number of timed runs
+    :return: best wall time in seconds
+    """
+    return min(repeat(lambda: engine(txt, pat), number=1, repeat=runs))
+
+
+def compare_bitwisepm(txt_size: int, pat_sizes: list[int], alphabet_size: int = 4) -> None:
+    """
+    Compare the bitarray implementation of bitwisepm against the word-packed integer implementation
+
+    :param txt_size: length of the generated text
+    :param pat_sizes: lengths of the patterns to time
+    :param alphabet_size: number of distinct characters in the text
+    :return: None
+    """
+    txt = random_text(txt_size, alphabet_size)
+    print(f"{'m':>6} {'bitarray (s)':>14} {'int (s)':>10} {'speedup':>8}")
+    for m in pat_sizes:
+        pat = txt[txt_size // 2: txt_size // 2 + m]     # taken from the text so there is at least one match
+        assert bitwisepm(txt, pat) == bitwisepm_int(txt, pat)
+        t_bitarray = time_engine(bitwisepm, txt, pat)
+        t_int = time_engine(bitwisepm_int, txt, pat)
+        print(f"{m:>6} {t_bitarray:>14.4f} {t_int:>10.4f} {t_bitarray / t_int:>7.1f}x")
+
+
+def compare_bitwisepm_many(txt_size: int, pat_counts: list[int], m: int = 8, alphabet_size: int = 4) -> None:
+    """
+    Compare one bitwisepm_int scan per pattern against a single bitwisepm_many scan for all the patterns
+
+    :param txt_size: length of the generated text
+    :param pat_counts: numbers of patterns to time
+    :param m: length of each pattern
+    :param alphabet_size: number of distinct characters in the text
+    :return: None
+    """
+    txt = random_text(txt_size, alphabet_size)
+    rng = Random(1)
+    print(f"{'K':>6} {'K scans (s)':>12} {'one scan (s)':>13} {'speedup':>8}")
+    for k in pat_counts:
+        starts = [rng.randrange(txt_size - m) for _ in range(k)]
+        pats = [txt[s:s + m] for s in starts]
+        t_single = min(repeat(lambda: [bitwisepm_int(txt, pat) for pat in pats], number=1, repeat=3))
+        t_many = min(repeat(lambda: bitwisepm_many(txt, pats), number=1, repeat=3))
+        print(f"{k:>6} {t_single:>12.4f} {t_many:>13.4f} {t_single / t_many:>7.1f}x")
+
+
+def measure_preprocessing(build, pat: str) -> tuple[float, int]:
+    """
+    Measure the wall time and the memory retained by a preprocessing function
+
+    :param build: preprocessing function taking the pattern
+    :param pat: pattern string to preprocess
+    :return: tuple of the wall time in seconds and the bytes allocated by the resulting table
+    """
+    tracemalloc.start()
+    begin = perf_counter()
+    table = build(pat)
+    elapsed = perf_counter() - begin
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del table
+    return elapsed, size
+
+
+def compare_bm_tables(pat_sizes: list[int], alphabet_size: int = NO_OF_CHARS) -> None:
+    """
+    Compare the time and memory of the full Boyer-Moore preprocessing tables against the compact array-backed ones
+
+    :param pat_sizes: lengths of the patterns to preprocess
+    :param alphabet_size: number of distinct characters in the patterns
+    :return: None
+    """
+    print(f"{'m':>7} {'full (s)':>9} {'full (MB)':>10} {'compact (s)':>12} {'compact (MB)':>13}")
+    for m in pat_sizes:
+        pat = random_text(m, alphabet_size)
+        t_full, mem_full = measure_preprocessing(lambda p: (extended_bad_character(p), good_suffix(p)), pat)
+        t_compact, mem_compact = measure_preprocessing(lambda p: (compact_bad_character(p), compact_good_suffix(p)), pat)
+        print(f"{m:>7} {t_full:>9.4f} {mem_full / 2 ** 20:>10.2f} {t_compact:>12.4f} {mem_compact / 2 ** 20:>13.2f}")
+
+
+def measure_search(engine, txt: str, pat: str, *args) -> tuple[float, int]:
+    """
+    Measure the wall time and the peak memory of a search, in two separate runs since tracing allocations slows the
+    search down
+
+    :param engine: matcher taking (txt, pat, *args)
+    :param txt: main string to search through
+    :param pat: pattern string to be matched
+    :param args: extra arguments passed to the matcher
+    :return: tuple of the wall time in seconds and the peak bytes allocated during the search
+    """
+    begin = perf_counter()
+    engine(txt, pat, *args)
+    elapsed = perf_counter() - begin
+
+    tracemalloc.start()
+    engine(txt, pat, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def compare_modes(txt_size: int, m: int = 8, k: int = 10) -> None:
+    """
+    Compare the list-returning path of the matchers against the count, exists and first_k modes on the periodic text
+    a^n, where every position is a match
+
+    :param txt_size: length of the text
+    :param m: length of the pattern
+    :param k: number of matches returned in the first_k mode
+    :return: None
+    """
+    txt = "a" * txt_size
+    pat = "a" * m
+    engines = {
+        "boyer_moore": lambda t, p, mode: boyer_moore(t, p, False, mode, k),
+        "bitwisepm_int": lambda t, p, mode: bitwisepm_int(t, p, mode, k),
+    }
+    print(f"{'engine':>14} {'mode':>8} {'time (s)':>9} {'peak (MB)':>10}")
+    for name, engine in engines.items():
+        for mode in ("all", "count", "exists", "first_k"):
+            elapsed, peak = measure_search(engine, txt, pat, mode)
+            print(f"{name:>14} {mode:>8} {elapsed:>9.4f} {peak / 2 ** 20:>10.2f}")
+
+
+def compare_engine_choice(txt_size: int, alphabet_sizes: list[int], pat_sizes: list[int]) -> None:
+    """
+    Compare the engine picked by search.choose_engine against the fastest engine on random texts of growing alphabet
+    size, which is how the costs of the cost model were fitted
+
+    :param txt_size: length of the generated texts
+    :param alphabet_sizes: numbers of distinct characters in the texts
+    :param pat_sizes: lengths of the patterns
+    :return: None
+    """
+    engines = {name: search for name, search in SUITE_ENGINES.items() if name not in ("naive", "bitwisepm")}
+    print(f"{'|A|':>4} {'m':>5} {'fastest':>14} {'chosen':>14} {'slowdown':>9}")
+    for alphabet_size in alphabet_sizes:
+        txt = random_text(txt_size, alphabet_size)
+        for m in pat_sizes:
+            pat = txt[txt_size // 2: txt_size // 2 + m]
+            times = {name: time_engine(search, txt, pat) for name, search in engines.items()}
+            fastest = min(times, key=times.get)
+            chosen = choose_engine(txt, pat)
+            print(f"{alphabet_size:>4} {m:>5} {fastest:>14} {chosen:>14} {times[chosen] / times[fastest]:>8.2f}x")
+
+
+def compare_prefilter(txt_size: int, pat_sizes: list[int], seed: int = 0) -> None:
+    """
+    Compare the plain Boyer-Moore search against the rare character prefilter on every corpus of CORPORA, with the
+    estimated frequency of the character the prefilter jumps between
+
+    :param txt_size: length of the generated texts
+    :param pat_sizes: lengths of the patterns, taken from the middle of the texts
+    :param seed: seed of the text generators
+    :return: None
+    """
+    print(f"{'corpus':>9} {'m':>5} {'frequency':>10} {'plain':>10} {'prefilter':>10} {'speedup':>8}")
+    for corpus, (generate, _) in CORPORA.items():
+        txt = generate(txt_size, seed=seed)
+        for m in pat_sizes:
+            pat = txt[txt_size // 2: txt_size // 2 + m]
+            _, frequency = rarest_character(txt, pat)
+            plain = time_engine(boyer_moore, txt, pat)
+            prefiltered = time_engine(lambda t, p: boyer_moore(t, p, prefilter=True), txt, pat)
+            print(f"{corpus:>9} {m:>5} {frequency:>10.4f} {plain:>10.4f} {prefiltered:>10.4f} {plain / prefiltered:>7.2f}x")
+
+
+if __name__ == "__main__":
+    # python benchmark.py suite [report.json] [baseline.json]  -- run the corpus suite and write a JSON report
+    # python benchmark.py [text length]                        -- run the engine comparisons
+    if len(sys.argv) > 1 and sys.argv[1] == "suite":
+        suite_report = run_suite([10_000, 100_000, 1_000_000], [4, 16, 64, 256])
+        write_report(suite_report, sys.argv[2] if len(sys.argv) > 2 else "benchmark_report.json")
+        for name, fastest in best_engines(suite_report).items():
+            print(f"{name:>28} {fastest}")
+        if len(sys.argv) > 3:
+            f = open(sys.argv[3], "r")
+            baseline_report = json.load(f)
+            f.close()
+            for regression in find_regressions(baseline_report, suite_report):
+                print("REGRESSION", regression)
+    else:
+        txt_length = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+        compare_bitwisepm(txt_length, [4, 16, 64, 256, 1024])
+        compare_bitwisepm_many(txt_length, [1, 10, 100, 500])
+        compare_bm_tables([100, 1_000, 10_000, 100_000])
+        compare_modes(txt_length)
+        compare_engine_choice(txt_length, [1, 2, 4, 8, 94], [1, 2, 4, 8, 32, 256])
+        compare_prefilter(txt_length, [4, 16, 64, 256])
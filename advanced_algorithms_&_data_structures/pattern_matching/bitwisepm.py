@@ -1,58 +1,312 @@
+from argparse import ArgumentParser
+from typing import Iterator
 from bitarray import bitarray
-from utils import gusfield_z, get_char_index, read_file, output_results, NO_OF_CHARS
-import sys
+from utils import gusfield_z, get_index_function, as_byte_view, as_pattern_bytes, window_verifier, read_file, \
+    output_results, collect_matches, NO_OF_CHARS, OTHER_CHAR_INDEX, OUTPUT_FORMATS
 
 
-def bitwisepm(txt: str, pat: str):
+def iter_bitwisepm(txt: str, pat: str) -> Iterator[int]:
     """
-    Bitwise pattern matching algorithm
+    Bitwise pattern matching algorithm, yielding the matches as they are found
 
     Time Complexity: O(m + n)
 
-    :param txt:main string to search through
+    :param txt:main string to search through, or a bytes-like object which is searched without being copied or decoded
     :param pat: pattern string to be matched against the main string txt
-    :return: indices of where the matches occur (1-indexing)
+    :return: generator of indices of where the matches occur (1-indexing)
     """
+    if not isinstance(txt, str):   # bytes mode, the text is searched in place through a memoryview
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
+
     m = len(pat)
     n = len(txt)
-    matches = []
+    char_index = get_index_function(txt)
 
-    if n < m:   # the text is shorter than the pattern
-        return matches
+    if m == 0 or n < m:     # empty pattern, or the text is shorter than the pattern
+        return
 
     # find the first bitvector using z-algorithm & pattern matching
     # essentially if any of txt[1...m]'s suffixes match pat[1...m]'s prefixes
-    string = f"{pat}${txt[:m]}"         # string concatenation with f-string O(2 * m)
+    if isinstance(txt, str):
+        string = f"{pat}${txt[:m]}"     # string concatenation with f-string O(2 * m)
+    else:
+        string = pat + b"$" + txt[:m].tobytes()     # only the first m bytes are copied
     z_values = gusfield_z(string)
     bitvec = bitarray()
-    for val in z_values[m + 1:]:        # only interested in the z-values after the $, loop scales with m, constant boolean operations
-        bitvec.append(not bool(val))
+    for i, val in enumerate(z_values[m + 1:]):     # only interested in the z-values after the $, loop scales with m, constant boolean operations
+        bitvec.append(val != m - i)                 # txt[i:m] must match the whole prefix of the pattern, not just part of it
 
     # if match found at first index
     if not bitvec[0]:
-        matches.append(1)
+        yield 1
 
     # preprocess delta bitvectors, with the idea that, delta bitvector is essentially comparing the pattern string with each character in the alphabet
-    deltas = {i: bitarray() for i in range(NO_OF_CHARS)}            # O(|A|) dictionary initalization
-    for i in range(NO_OF_CHARS):                                    # nested loop overall O(|A| * m)
+    # one extra delta bitvector for OTHER_CHAR_INDEX, shared by every character outside of the alphabet
+    deltas = {i: bitarray() for i in range(NO_OF_CHARS + 1)}        # O(|A|) dictionary initalization
+    for i in range(NO_OF_CHARS + 1):                                # nested loop overall O(|A| * m)
         for j in range(m - 1, -1, -1):
-            deltas[i].append(get_char_index(pat[j]) != i)
+            deltas[i].append(char_index(pat[j]) != i)
+
+    # when the pattern has characters outside of the alphabet, they match any other such character in the bitvectors,
+    # so the window of each match is compared to tell them apart
+    verify = window_verifier(txt, pat) if OTHER_CHAR_INDEX in map(char_index, pat) else None
 
     # the first bitvector is bitvector_m, so we just need to get the bitvectors m to n
     for j in range(m, n):   # loop scales with n
-        bitvecJ = bitvec << 1 | deltas[get_char_index(txt[j])]      # relationship provided in the brief using bitwise operations
+        bitvecJ = bitvec << 1 | deltas[char_index(txt[j])]          # relationship provided in the brief using bitwise operations
 
-        if not bitvecJ[0]:
-            matches.append(j - m + 2)                               # j-m+1 gets the 0-indexing index, another +1 to make it 1-indexing
+        if not bitvecJ[0] and (verify is None or verify(pat, j - m + 1)):
+            yield j - m + 2                                         # j-m+1 gets the 0-indexing index, another +1 to make it 1-indexing
 
         bitvec = bitvecJ                                            # updating bitvec_{j-1}
 
+
+def bitwisepm(txt: str, pat: str, mode: str = "all", k: int = None):
+    """
+    Bitwise pattern matching algorithm
+
+    Time Complexity: O(m + n), the search stops early in the "exists" and "first_k" modes
+
+    :param txt:main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode
+    """
+    return collect_matches(iter_bitwisepm(txt, pat), mode, k)
+
+
+def int_deltas(pat: str) -> dict[str, int]:
+    """
+    Preprocess the delta bitvectors of the pattern as integers, where bit j of delta(x) is 0 if and only if pat[j] == x.
+    The dictionary is keyed by character so the text loop needs no get_char_index call per character, and characters
+    that do not appear in the pattern are left out, their delta bitvector being all ones. For a bytes pattern the keys
+    are the byte values.
+
+    Time Complexity: O(m) where m is the length of the pattern string
+
+    :param pat: pattern string or bytes to preprocess
+    :return: dictionary mapping each character of the pattern to its delta bitvector
+    """
+    all_ones = (1 << len(pat)) - 1
+    deltas = {}
+    for j in range(len(pat)):       # loop scales with m
+        deltas[pat[j]] = deltas.get(pat[j], all_ones) & ~(1 << j)
+    return deltas
+
+
+def iter_bitwisepm_int(txt: str, pat: str) -> Iterator[int]:
+    """
+    Word-packed variant of the bitwise pattern matching algorithm which keeps the bitvector and the delta bitvectors as
+    native Python integers instead of bitarrays. Bit j of an integer corresponds to pat[j], so the relationship
+    bitvec << 1 | delta from the brief becomes a single integer shift and a match is found whenever bit m - 1 is 0.
+    Python integers are stored as arrays of machine words, so patterns longer than a word are processed as blocks of
+    words without any extra bookkeeping, and no new object other than the resulting integer is allocated per character.
+
+    Time Complexity: O(m + n * ceil(m / w)) where w is the machine word size
+
+    :param txt: main string to search through, or a bytes-like object which is searched without being copied or decoded
+    :param pat: pattern string to be matched against the main string txt
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    if not isinstance(txt, str):   # bytes mode, iterating the memoryview gives integers, as does indexing the bytes pattern
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
+
+    m = len(pat)
+    n = len(txt)
+
+    if m == 0 or n < m:     # empty pattern, or the text is shorter than the pattern
+        return
+
+    all_ones = (1 << m) - 1
+    deltas = int_deltas(pat)
+
+    # starting from the all-ones bitvector means no prefix of the pattern is matched yet, so bitvectors 1 to m - 1
+    # never report a match and the z-algorithm initialization is not needed
+    bitvec = all_ones
+    match_bit = 1 << (m - 1)
+    get_delta = deltas.get
+    for j, char in enumerate(txt):      # loop scales with n
+        bitvec = ((bitvec << 1) | get_delta(char, all_ones)) & all_ones
+
+        if not bitvec & match_bit:
+            yield j - m + 2                                         # j-m+1 gets the 0-indexing index, another +1 to make it 1-indexing
+
+
+def bitwisepm_int(txt: str, pat: str, mode: str = "all", k: int = None):
+    """
+    Word-packed variant of the bitwise pattern matching algorithm, see iter_bitwisepm_int
+
+    Time Complexity: O(m + n * ceil(m / w)), the search stops early in the "exists" and "first_k" modes
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode
+    """
+    return collect_matches(iter_bitwisepm_int(txt, pat), mode, k)
+
+
+def bitwisepm_many(txt: str, pats: list[str]) -> dict[str, list[int]]:
+    """
+    Multi-pattern variant of bitwisepm_int which packs every pattern into one combined integer bitvector, so the text
+    is scanned once regardless of the number of patterns. Pattern k occupies the bits [offset_k, offset_k + m_k) and its
+    delta bitvectors are built exactly like the single pattern ones, then shifted to its offset. After every shift the
+    bit at the start of each pattern is cleared, so the top bit of one pattern never leaks into the next one.
+
+    Time Complexity: O(M + n * ceil(M / w) + z) where M is the total length of the patterns, w is the machine word size
+    and z is the number of matches
+
+    :param txt: main string to search through, or a bytes-like object which is searched without being copied or decoded
+    :param pats: pattern strings to be matched against the main string txt
+    :return: dictionary mapping each pattern to the indices of where its matches occur (1-indexing)
+    """
+    matches = {pat: [] for pat in pats}
+    unique_pats = [pat for pat in matches if pat]       # duplicates share one slot, empty patterns never match
+    if not unique_pats:
+        return matches
+    if not isinstance(txt, str):   # bytes mode, iterating the memoryview gives integers, as does indexing the bytes patterns
+        txt = as_byte_view(txt)
+        keys = [as_pattern_bytes(pat) for pat in unique_pats]
+    else:
+        keys = unique_pats
+
+    # preprocess the combined delta bitvectors and the bookkeeping of where each pattern lives in the bitvector
+    offset = 0
+    start_bits = 0
+    end_bits = 0
+    end_owner = {}      # bit position of the last character of a pattern -> (pattern, pattern length)
+    deltas = {}
+    for pat, key in zip(unique_pats, keys):     # loop scales with the total length of the patterns
+        m = len(key)
+        for j in range(m):
+            deltas[key[j]] = deltas.get(key[j], 0) | (1 << (offset + j))
+        start_bits |= 1 << offset
+        end_bits |= 1 << (offset + m - 1)
+        end_owner[offset + m - 1] = (pat, m)
+        offset += m
+
+    # stored as the positions of each character, so invert to get the delta bitvectors
+    all_ones = (1 << offset) - 1
+    for char in deltas:
+        deltas[char] = all_ones & ~deltas[char]
+    keep = all_ones & ~start_bits
+
+    bitvec = all_ones
+    get_delta = deltas.get
+    for j, char in enumerate(txt):      # loop scales with n
+        bitvec = ((bitvec << 1) & keep) | get_delta(char, all_ones)
+
+        hits = ~bitvec & end_bits
+        while hits:     # loop scales with the number of patterns matching at j
+            lowest = hits & -hits
+            pat, m = end_owner[lowest.bit_length() - 1]
+            matches[pat].append(j - m + 2)
+            hits ^= lowest
+
     return matches
 
 
+APPROXIMATE_METRICS = ("hamming", "edit")
+
+
+def iter_bitwisepm_approx(txt: str, pat: str, max_d: int, metric: str = "hamming") -> Iterator[tuple[int, int]]:
+    """
+    Approximate bitwise pattern matching, allowing up to max_d mismatches (hamming) or edits (edit). One bitvector is kept
+    per number of errors d, following Wu and Manber, where bit j of bitvec_d is 0 if pat[0...j] matches the text ending at
+    the current character with at most d errors. Every bitvector uses the same integer delta bitvectors as bitwisepm_int:
+        hamming: bitvec_d = (bitvec_d << 1 | delta) & (old bitvec_{d-1} << 1)
+        edit:    bitvec_d = (bitvec_d << 1 | delta) & (old bitvec_{d-1} << 1) & (new bitvec_{d-1} << 1) & old bitvec_{d-1}
+    where the extra terms are a substitution, a deletion from the pattern and an insertion into the pattern. Each text
+    character costs max_d + 1 word-parallel integer operations, so the work grows with max_d and only with ceil(m / w).
+
+    Time Complexity: O(m + max_d * n * ceil(m / w)) where w is the machine word size
+
+    :param txt: main string to search through, or a bytes-like object which is searched without being copied or decoded
+    :param pat: pattern string to be matched against the main string txt
+    :param max_d: maximum number of errors allowed
+    :param metric: one of APPROXIMATE_METRICS
+    :return: generator of (index, number of errors) for each match, where the index is where the match starts for
+             hamming and where it ends for edit, since the start of an edit distance match is ambiguous (1-indexing)
+    """
+    if metric not in APPROXIMATE_METRICS:
+        raise ValueError(f"unknown metric {metric!r}, expected one of {APPROXIMATE_METRICS}")
+    if max_d < 0:
+        raise ValueError("max_d must be non-negative")
+
+    if not isinstance(txt, str):   # bytes mode, see iter_bitwisepm_int
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
+
+    m = len(pat)
+    hamming = metric == "hamming"
+    if m == 0 or (hamming and len(txt) < m):
+        return
+
+    all_ones = (1 << m) - 1
+    match_bit = 1 << (m - 1)
+    get_delta = int_deltas(pat).get
+
+    # for edit distance the first d characters of the pattern can always be deleted
+    bitvecs = [all_ones if hamming else (all_ones << d) & all_ones for d in range(max_d + 1)]
+
+    for j, char in enumerate(txt):      # loop scales with n
+        delta = get_delta(char, all_ones)
+
+        previous = bitvecs[0]           # bitvec_{d-1} before this character
+        new = ((previous << 1) | delta) & all_ones
+        bitvecs[0] = new
+        errors = 0 if not new & match_bit else -1
+
+        for d in range(1, max_d + 1):   # loop scales with max_d
+            old = bitvecs[d]
+            if hamming:
+                new = ((old << 1) | delta) & (previous << 1) & all_ones
+            else:
+                new = ((old << 1) | delta) & (previous << 1) & (new << 1) & previous & all_ones
+            bitvecs[d] = new
+            previous = old
+            if errors < 0 and not new & match_bit:
+                errors = d
+
+        if errors >= 0:
+            yield (j - m + 2 if hamming else j + 1), errors
+
+
+def bitwisepm_approx(txt: str, pat: str, max_d: int, metric: str = "hamming") -> list[tuple[int, int]]:
+    """
+    Approximate bitwise pattern matching, see iter_bitwisepm_approx
+
+    Time Complexity: O(m + max_d * n * ceil(m / w))
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param max_d: maximum number of errors allowed
+    :param metric: one of APPROXIMATE_METRICS
+    :return: (index, smallest number of errors) of each match (1-indexing)
+    """
+    return list(iter_bitwisepm_approx(txt, pat, max_d, metric))
+
+
 if __name__ == "__main__":
-    _, filename1, filename2 = sys.argv
-    txt_str = read_file(filename1)
-    pat_str = read_file(filename2)
-    matching_ids = bitwisepm(txt_str, pat_str)
-    output_results(matching_ids, "output_bitwisepm.txt")
+    parser = ArgumentParser()
+    parser.add_argument("txt_file")
+    parser.add_argument("pat_file")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="text writes one match per line, the others write a binary file readable by read_results")
+    parser.add_argument("--max-d", type=int, default=0,
+                        help="maximum number of errors, writes 'index errors' lines when positive")
+    parser.add_argument("--metric", choices=APPROXIMATE_METRICS, default="hamming")
+    args = parser.parse_args()
+    if args.max_d and args.format != "text":
+        parser.error("approximate matches can only be written in the text format")
+    txt_str = read_file(args.txt_file)
+    pat_str = read_file(args.pat_file)
+    if args.max_d:
+        matching_ids = (f"{index} {errors}" for index, errors in iter_bitwisepm_approx(txt_str, pat_str, args.max_d, args.metric))
+    else:
+        matching_ids = bitwisepm(txt_str, pat_str)
+    output_results(matching_ids, f"output_bitwisepm.{'txt' if args.format == 'text' else 'bin'}", args.format)
@@ -0,0 +1,127 @@
+from typing import Iterator
+from utils import as_byte_view, as_pattern_bytes, window_verifier, read_file, output_results, collect_matches
+import sys
+
+
+def horspool_shifts(pat: str) -> dict:
+    """
+    Preprocess the Horspool shift table, which shifts the window so that its last character lines up with the rightmost
+    occurence of that character in pat[0...m-2]. Characters not in the table shift the window by m.
+
+    Time Complexity: O(m) where m is the length of the pattern string
+
+    :param pat: pattern string or bytes to preprocess
+    :return: dictionary mapping a character to its shift
+    """
+    m = len(pat)
+    return {pat[i]: m - 1 - i for i in range(m - 1)}    # later occurences overwrite earlier ones
+
+
+def sunday_shifts(pat: str) -> dict:
+    """
+    Preprocess the Sunday (quick search) shift table, which looks at the character right after the window and shifts
+    so that it lines up with its rightmost occurence in the pattern. Characters not in the table shift the window by m + 1.
+
+    Time Complexity: O(m) where m is the length of the pattern string
+
+    :param pat: pattern string or bytes to preprocess
+    :return: dictionary mapping a character to its shift
+    """
+    m = len(pat)
+    return {pat[i]: m - i for i in range(m)}
+
+
+def iter_horspool(txt: str, pat: str) -> Iterator[int]:
+    """
+    Horspool's simplification of Boyer-Moore, which only uses a bad character shift on the last character of the window.
+    Windows are verified with window_verifier, which runs at C speed.
+
+    Time Complexity: O(m * n) worst case, O(n / m) on average over large alphabets
+
+    :param txt: main string to search through, or a bytes-like object which is searched without being copied or decoded
+    :param pat: pattern string to be matched against the main string txt
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    if not isinstance(txt, str):
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
+
+    m = len(pat)
+    n = len(txt)
+    if m == 0:
+        return
+
+    get_shift = horspool_shifts(pat).get
+    verify = window_verifier(txt, pat)
+    last = pat[m - 1]
+    shift = 0
+    while shift <= n - m:
+        char = txt[shift + m - 1]
+        if char == last and verify(pat, shift):
+            yield shift + 1
+        shift += get_shift(char, m)
+
+
+def iter_sunday(txt: str, pat: str) -> Iterator[int]:
+    """
+    Sunday's quick search variant of Horspool, which shifts on the character following the window, allowing shifts of
+    up to m + 1.
+
+    Time Complexity: O(m * n) worst case, O(n / (m + 1)) on average over large alphabets
+
+    :param txt: main string to search through, or a bytes-like object which is searched without being copied or decoded
+    :param pat: pattern string to be matched against the main string txt
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    if not isinstance(txt, str):
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
+
+    m = len(pat)
+    n = len(txt)
+    if m == 0:
+        return
+
+    get_shift = sunday_shifts(pat).get
+    verify = window_verifier(txt, pat)
+    shift = 0
+    while shift <= n - m:
+        if verify(pat, shift):
+            yield shift + 1
+        if shift + m == n:
+            return
+        shift += get_shift(txt[shift + m], m + 1)
+
+
+def horspool(txt: str, pat: str, mode: str = "all", k: int = None):
+    """
+    Horspool pattern matching, see iter_horspool
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode
+    """
+    return collect_matches(iter_horspool(txt, pat), mode, k)
+
+
+def sunday(txt: str, pat: str, mode: str = "all", k: int = None):
+    """
+    Sunday pattern matching, see iter_sunday
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode
+    """
+    return collect_matches(iter_sunday(txt, pat), mode, k)
+
+
+if __name__ == "__main__":
+    _, filename1, filename2 = sys.argv
+    txt_str = read_file(filename1)
+    pat_str = read_file(filename2)
+    matching_ids = horspool(txt_str, pat_str)
+    output_results(matching_ids, "output_horspool.txt")
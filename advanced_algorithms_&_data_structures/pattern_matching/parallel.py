@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from utils import read_file, output_results
+from stricterBM import boyer_moore
+from bitwisepm import bitwisepm, bitwisepm_int
+import sys
+
+# encodings used to hold the text in shared memory, with the number of bytes each takes per character
+SHARED_ENCODINGS = {1: "latin-1", 4: "utf-32-le"}
+
+PARALLEL_ENGINES = {
+    "boyer_moore": boyer_moore,
+    "bitwisepm": bitwisepm,
+    "bitwisepm_int": bitwisepm_int,
+}
+
+
+def search_segment(shm_name: str, start: int, end: int, pat: str, engine: str, width: int = 1) -> list[int]:
+    """
+    Worker function to search one segment of a text held in shared memory. Only the segment is copied out of the shared
+    block, the text itself is never pickled.
+
+    :param shm_name: name of the shared memory block holding the encoded text
+    :param start: 0-indexed position of the first character of the segment
+    :param end: 0-indexed position after the last character of the segment
+    :param pat: pattern string to be matched
+    :param engine: name of the matcher, one of PARALLEL_ENGINES
+    :param width: number of bytes per character of the text, a key of SHARED_ENCODINGS
+    :return: global indices of where the matches occur in the segment (1-indexing)
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        segment = bytes(shm.buf[width * start:width * end]).decode(SHARED_ENCODINGS[width])
+    finally:
+        shm.close()
+    return [start + match for match in PARALLEL_ENGINES[engine](segment, pat)]
+
+
+def parallel_search(txt: str, pat: str, engine: str = "boyer_moore", workers: int = None,
+                    segment_size: int = None) -> list[int]:
+    """
+    Search a text with a pool of worker processes. The text is split into segments, each extended by the m - 1
+    characters following it so that matches straddling a boundary are found by exactly one segment, and the segments are
+    searched in parallel through shared memory.
+
+    Time Complexity: O(m + n) work in total, divided between the workers
+
+    :param txt: main string to search through, held in shared memory as latin-1 when every character fits in a byte and
+                as UTF-32 otherwise
+    :param pat: pattern string to be matched against the main string txt
+    :param engine: name of the matcher, one of PARALLEL_ENGINES
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :param segment_size: number of match starting positions handled per segment, defaults to splitting the text evenly
+                         between the workers
+    :return: indices of where the matches occur (1-indexing)
+    """
+    if engine not in PARALLEL_ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {sorted(PARALLEL_ENGINES)}")
+
+    m = len(pat)
+    n = len(txt)
+    if n < m or m == 0:
+        return []
+
+    workers = workers or cpu_count() or 1
+    segment_size = segment_size or -(-n // workers)     # ceiling division
+
+    # fixed-width encodings keep character positions and byte offsets proportional
+    try:
+        width = 1
+        data = txt.encode("latin-1")
+    except UnicodeEncodeError:
+        width = 4
+        data = txt.encode("utf-32-le")
+    shm = SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[:len(data)] = data
+        del data
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(search_segment, shm.name, start, min(n, start + segment_size + m - 1), pat, engine,
+                                       width)
+                       for start in range(0, n - m + 1, segment_size)]
+            matches = set()
+            for future in futures:
+                matches.update(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # segments never overlap in starting positions, but de-duplicate anyway in case of a custom segmentation
+    return sorted(matches)
+
+
+if __name__ == "__main__":
+    _, filename1, filename2, *rest = sys.argv
+    txt_str = read_file(filename1)
+    pat_str = read_file(filename2)
+    engine_name = rest[0] if rest else "boyer_moore"
+    no_of_workers = int(rest[1]) if len(rest) > 1 else None
+    matching_ids = parallel_search(txt_str, pat_str, engine_name, no_of_workers)
+    output_results(matching_ids, "output_parallel.txt")
@@ -0,0 +1,130 @@
+from collections import Counter
+from utils import as_byte_view, as_pattern_bytes, read_file, output_results
+from stricterBM import boyer_moore
+from bitwisepm import bitwisepm, bitwisepm_int
+from horspool import horspool, sunday, horspool_shifts, sunday_shifts
+import sys
+
+SEARCH_ENGINES = {
+    "boyer_moore": boyer_moore,
+    "bitwisepm": bitwisepm,
+    "bitwisepm_int": bitwisepm_int,
+    "horspool": horspool,
+    "sunday": sunday,
+}
+
+# Costs of the cost model, relative to one character of the bit-parallel engine, fitted by least squares on the timings
+# of benchmark.compare_engine_choice and the corpora of benchmark.CORPORA (n = 100000, m = 1 to 256). The bit-parallel
+# engine pays the same for every character, the skip loops pay per alignment, so they win as soon as the expected shift
+# is large enough. Sunday verifies every window but shifts on the character after it, which only pays off where its
+# expected shift is nearly twice Horspool's. Text size cancels out, as every cost is linear in n. Boyer-Moore's extra
+# bookkeeping per alignment only paid off, and not reliably, for patterns of hundreds of characters over 2 or 3
+# characters, so it is only used when asked for.
+SAMPLE_SIZE = 4096              # number of characters of the text used to estimate the character frequencies
+BIT_PARALLEL_COST = 1.0         # per character of the text
+HORSPOOL_COST = 1.0             # per alignment
+HORSPOOL_VERIFY_COST = 1.2      # per alignment whose last character matches, the window is then verified
+SUNDAY_COST = 2.0               # per alignment, every window is verified, rounded up from 1.9 so that ties go to the
+                                # bit-parallel engine for single character patterns
+
+
+def sample_frequencies(txt, sample_size: int = SAMPLE_SIZE) -> dict:
+    """
+    Estimate the frequency of each character of the text from its first sample_size characters
+
+    Time Complexity: O(sample_size)
+
+    :param txt: string or bytes-like object
+    :param sample_size: number of characters to sample
+    :return: dictionary mapping each character (each byte value for bytes-like objects) to its frequency
+    """
+    sample = txt[:sample_size] if isinstance(txt, str) else as_byte_view(txt)[:sample_size]
+    size = len(sample)
+    return {char: count / size for char, count in Counter(sample).items()}
+
+
+def expected_shift(shifts: dict, frequencies: dict, default: int) -> float:
+    """
+    Expected shift of a skip loop on a text with the given character frequencies, the characters missing from the shift
+    table shifting by default
+
+    Time Complexity: O(m) where m is the length of the pattern
+
+    :param shifts: shift table of the pattern, see horspool_shifts and sunday_shifts
+    :param frequencies: character frequencies, see sample_frequencies
+    :param default: shift of the characters missing from the table
+    :return: expected shift
+    """
+    missing = 1.0 - sum(frequencies.get(char, 0.0) for char in shifts)
+    return missing * default + sum(frequencies.get(char, 0.0) * shift for char, shift in shifts.items())
+
+
+def estimate_costs(txt, pat) -> dict:
+    """
+    Estimate the cost per character of the text of each engine the cost model picks from. The skip loops cost their
+    cost per alignment divided by their expected shift, which is large for long patterns over texts of many evenly
+    spread characters and falls towards 1 for short patterns or near-constant texts.
+
+    :param txt: main string to search through, or a bytes-like object
+    :param pat: pattern string to be matched
+    :return: dictionary mapping the name of each engine to its estimated cost
+    """
+    if not isinstance(txt, str):
+        pat = as_pattern_bytes(pat)
+    m = len(pat)
+    frequencies = sample_frequencies(txt)
+    horspool_shift = max(expected_shift(horspool_shifts(pat), frequencies, m), 1.0)
+    sunday_shift = max(expected_shift(sunday_shifts(pat), frequencies, m + 1), 1.0)
+    last = frequencies.get(pat[m - 1], 0.0)
+    return {
+        "bitwisepm_int": BIT_PARALLEL_COST,
+        "horspool": (HORSPOOL_COST + HORSPOOL_VERIFY_COST * last) / horspool_shift,
+        "sunday": SUNDAY_COST / sunday_shift,
+    }
+
+
+def choose_engine(txt, pat) -> str:
+    """
+    Pick the engine of SEARCH_ENGINES expected to be the fastest, the one of least estimated cost, see estimate_costs
+
+    :param txt: main string to search through, or a bytes-like object
+    :param pat: pattern string to be matched
+    :return: name of the engine
+    """
+    if len(pat) == 0 or len(txt) == 0:
+        return "horspool"
+    costs = estimate_costs(txt, pat)
+    return min(costs, key=costs.get)
+
+
+def search(txt, pat, mode: str = "all", k: int = None, engine: str = None, explain: bool = False):
+    """
+    Exact pattern matching front-end, which picks an engine with choose_engine unless one is given
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap)
+    :param pat: pattern string to be matched against the main string txt
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :param engine: name of the engine to use instead of choosing one, one of SEARCH_ENGINES
+    :param explain: also return the name of the engine used
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode, paired
+             with the name of the engine if explain is set
+    """
+    engine = engine or choose_engine(txt, pat)
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {sorted(SEARCH_ENGINES)}")
+
+    if engine == "boyer_moore":
+        result = boyer_moore(txt, pat, mode=mode, k=k)
+    else:
+        result = SEARCH_ENGINES[engine](txt, pat, mode, k)
+    return (result, engine) if explain else result
+
+
+if __name__ == "__main__":
+    _, filename1, filename2 = sys.argv
+    txt_str = read_file(filename1)
+    pat_str = read_file(filename2)
+    matching_ids, chosen = search(txt_str, pat_str, explain=True)
+    print(f"engine: {chosen}")
+    output_results(matching_ids, "output_search.txt")
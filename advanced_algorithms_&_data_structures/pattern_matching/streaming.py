@@ -0,0 +1,135 @@
+from codecs import getincrementaldecoder
+from os import PathLike
+from typing import BinaryIO, Iterator, Union
+from utils import read_file, output_results
+from stricterBM import compile_pattern
+from bitwisepm import int_deltas
+import sys
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# encoding of the text files, the same as read_file so that positions are character positions like the in-memory search
+DEFAULT_ENCODING = "utf-8"
+
+Source = Union[str, PathLike, BinaryIO]
+
+
+def read_chunks(source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                encoding: str = DEFAULT_ENCODING) -> Iterator[str]:
+    """
+    Utility generator to read a file path or a binary stream in fixed-size chunks. Bytes are decoded with an incremental
+    decoder, which holds back a character split by a chunk boundary until the rest of its bytes are read, so the chunks
+    hold whole characters and positions count characters rather than bytes.
+
+    :param source: file path or binary stream opened for reading
+    :param chunk_size: number of bytes to read at a time
+    :param encoding: encoding of the text, "latin-1" to count positions in bytes
+    :return: generator of text chunks
+    """
+    if isinstance(source, (str, PathLike)):
+        with open(source, "rb") as f:
+            yield from read_chunks(f, chunk_size, encoding)
+        return
+
+    decoder = getincrementaldecoder(encoding)()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def stream_bitwisepm(source: Source, pat: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     encoding: str = DEFAULT_ENCODING) -> Iterator[int]:
+    """
+    Streaming bitwise pattern matching. The bitvector is the only state of the algorithm, so it is simply carried over
+    from one chunk to the next and no overlap between chunks is needed.
+
+    Time Complexity: O(m + n * ceil(m / w)), Space Complexity: O(chunk_size + m)
+
+    :param source: file path or binary stream of the text to search through
+    :param pat: pattern string to be matched against the text
+    :param chunk_size: number of bytes to read at a time
+    :param encoding: encoding of the text
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    m = len(pat)
+    if m == 0:
+        return
+
+    all_ones = (1 << m) - 1
+    match_bit = 1 << (m - 1)
+    get_delta = int_deltas(pat).get
+
+    bitvec = all_ones
+    offset = 0      # number of characters in the previous chunks
+    for chunk in read_chunks(source, chunk_size, encoding):
+        for j, char in enumerate(chunk):
+            bitvec = ((bitvec << 1) | get_delta(char, all_ones)) & all_ones
+            if not bitvec & match_bit:
+                yield offset + j - m + 2
+        offset += len(chunk)
+
+
+def stream_boyer_moore(source: Source, pat: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       encoding: str = DEFAULT_ENCODING) -> Iterator[int]:
+    """
+    Streaming Boyer-Moore pattern matching. The last m - 1 characters of the searched window are kept and prepended to
+    the next chunk, so a match straddling a chunk boundary is still found. A match starting inside the kept overlap ends
+    in the new chunk, so it could not have been reported by the previous window and no de-duplication is needed.
+
+    Time Complexity: O(m + n) per chunk, Space Complexity: O(chunk_size + m)
+
+    :param source: file path or binary stream of the text to search through
+    :param pat: pattern string to be matched against the text
+    :param chunk_size: number of bytes to read at a time
+    :param encoding: encoding of the text
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    m = len(pat)
+    if m == 0:
+        return
+
+    compiled = compile_pattern(pat)
+    overlap = ""
+    offset = 0      # global 0-indexed position of the first character of the window
+    for chunk in read_chunks(source, chunk_size, encoding):
+        window = overlap + chunk
+        for match in compiled.finditer(window):
+            yield offset + match
+
+        overlap = window[max(0, len(window) - (m - 1)):] if m > 1 else ""
+        offset += len(window) - len(overlap)
+
+
+STREAMING_ENGINES = {
+    "bitwisepm": stream_bitwisepm,
+    "boyer_moore": stream_boyer_moore,
+}
+
+
+def stream_search(source: Source, pat: str, engine: str = "bitwisepm", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  encoding: str = DEFAULT_ENCODING) -> Iterator[int]:
+    """
+    Search a text which may be larger than memory for a pattern, reading it in fixed-size chunks
+
+    :param source: file path or binary stream of the text to search through
+    :param pat: pattern string to be matched against the text
+    :param engine: name of the matcher, one of STREAMING_ENGINES
+    :param chunk_size: number of bytes to read at a time
+    :param encoding: encoding of the text
+    :return: generator of indices of where the matches occur (1-indexing)
+    """
+    if engine not in STREAMING_ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {sorted(STREAMING_ENGINES)}")
+    return STREAMING_ENGINES[engine](source, pat, chunk_size, encoding)
+
+
+if __name__ == "__main__":
+    _, filename1, filename2, *rest = sys.argv
+    pat_str = read_file(filename2)
+    engine_name = rest[0] if rest else "bitwisepm"
+    size = int(rest[1]) if len(rest) > 1 else DEFAULT_CHUNK_SIZE
+    matching_ids = stream_search(filename1, pat_str, engine_name, size)
+    output_results(matching_ids, "output_streaming.txt")
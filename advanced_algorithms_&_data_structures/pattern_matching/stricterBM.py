@@ -1,22 +1,29 @@
+from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict, namedtuple
 from copy import copy
-from utils import gusfield_z, get_char_index, read_file, output_results, NO_OF_CHARS
-import sys
+from typing import Callable, Iterator
+from utils import gusfield_z, get_index_function, as_byte_view, as_pattern_bytes, window_verifier, read_file, \
+    output_results, collect_matches, NO_OF_CHARS, OTHER_CHAR_INDEX, OUTPUT_FORMATS
 
 
 def extended_bad_character(pat: str) -> list[list[int]]:
     """
-    Implementation of the extended bad character that finds the rightmost occurence of the bad character x in the pattern to the left of the mismatch
+    Implementation of the extended bad character that finds the rightmost occurence of the bad character x in the pattern to the left of the mismatch.
+    Each row has one extra column, OTHER_CHAR_INDEX, for the bytes outside of the alphabet.
 
     Time Complexity: O(|A| * m) where m |A| is the size of the alphabet and m is the length of the pattern string
 
-    :param pat: pattern to preprocess
+    :param pat: pattern to preprocess, a string or bytes
     :return: an R_k(x) matrix
     """
-    k_bad_chars = [[-1] * NO_OF_CHARS]
+    char_index = get_index_function(pat)
+    k_bad_chars = [[-1] * (NO_OF_CHARS + 1)]
 
     for i in range(1, len(pat)):
         bad_chars = copy(k_bad_chars[i - 1])    # copying one row of k_bad_chars which is of |A| size, so O(|A|) time (avoiding pointer issues)
-        bad_chars[get_char_index(pat[i - 1])] = i - 1
+        bad_chars[char_index(pat[i - 1])] = i - 1
         k_bad_chars.append(bad_chars)
 
     return k_bad_chars
@@ -26,28 +33,30 @@ def good_suffix(pat: str) -> list[dict]:
     """
     Modified implementation of the good suffix rule, where instead of storing the just rightmost occurence good suffix, we store all the good
     suffixes in a dictionary, with the key being the preceding character to said good suffixes. Values in the dictionaries are all initialized as None
-    except for a special key "GOOD", which only stores the rightmost occurence of the good suffix, initialized as 0. This value is used in the case
+    except for a special key "GOOD", which only stores the rightmost occurence of the good suffix, initialized as -1. This value is used in the case
     where the strict good suffix rule doesn't apply, that is, when there are no good suffixes in the pattern that has a preceding character that
     matches the bad character exactly, in which case, getting the value from the dictionary will result in a None value.
 
     Time Complexity: O(|A|*m) where |A| is the size of the alphabet and m is the length of the input pattern string.
 
-    :param pat: pattern string to preprocess
+    :param pat: pattern string to preprocess, a string or bytes
     :return:
     """
     m = len(pat)
+    char_index = get_index_function(pat)
 
     z_suffix = gusfield_z(pat[::-1])[::-1]                      # reverse string -> z-algorithm -> reverse output --- a series of O(m) operations
 
     gs_dicts = [None] * (m + 1)
     for i in range(m + 1):      # loop scaling with m
-        gs_dicts[i] = {i: None for i in range(NO_OF_CHARS)}     # dictionary creation scaling with alphabet size (constant)
-        gs_dicts[i]["GOOD"] = 0
+        gs_dicts[i] = {i: None for i in range(NO_OF_CHARS + 1)}     # dictionary creation scaling with alphabet size (constant), plus OTHER_CHAR_INDEX
+        gs_dicts[i]["GOOD"] = -1
 
     for p in range(m - 1):      # loop scaling with m, constant operations
         j = m - z_suffix[p]
         preceding_char = pat[p - z_suffix[p]]
-        gs_dicts[j][get_char_index(preceding_char)] = p
+        if char_index(preceding_char) != OTHER_CHAR_INDEX:     # characters outside of the alphabet share one index, so
+            gs_dicts[j][char_index(preceding_char)] = p         # the stricter rule cannot tell them apart
         gs_dicts[j]["GOOD"] = p
 
     return gs_dicts
@@ -69,80 +78,490 @@ def matched_prefix(pat: str) -> list[int]:
 
     j = 0
     for i in range(m - 1, 0, -1):       # loop scaling with m
-        j = max(j, z_values[i])
+        if i + z_values[i] == m:        # only suffixes which are also prefixes count
+            j = z_values[i]
         mp_values[i] = j
 
     return mp_values
 
 
-def boyer_moore(txt: str, pat: str) -> list[int]:
+def compact_bad_character(pat: str) -> dict[str, array]:
     """
-    Implementation of the boyer_moore algorithm with Galil optimization and the stricter good_suffix rule.
+    Compact version of the extended bad character table. Instead of a full row of the alphabet for every position of the
+    pattern, only the sorted positions of each character are stored, and R_k(x) is found by a binary search for the last
+    position of x before k.
 
-    Time Complexity: O(m + n)
+    Time Complexity: O(m), each lookup is O(log m)
 
-    :param txt: main string to search through
-    :param pat: pattern string to be matched against the main string txt
-    :return: indices of where the matches occur (1-indexing)
+    :param pat: pattern to preprocess
+    :return: dictionary mapping each character of the pattern to the sorted array of its positions
+    """
+    positions = {}
+    for i, char in enumerate(pat):      # loop scaling with m
+        if char not in positions:
+            positions[char] = array("i")
+        positions[char].append(i)
+    return positions
+
+
+def compact_good_suffix(pat: str) -> tuple[array, dict[tuple[int, str], int]]:
+    """
+    Compact version of the good suffix table. The rightmost occurence of each good suffix (the "GOOD" key) is stored in a
+    flat array, and the occurences used by the stricter rule are stored sparsely, keyed by (j, preceding character). Each
+    position of the pattern contributes exactly one entry, so the table holds O(m) values instead of O(|A| * m).
+
+    Time Complexity: O(m) where m is the length of the input pattern string
+
+    :param pat: pattern string to preprocess
+    :return: tuple of the rightmost good suffix array and the stricter good suffix dictionary
     """
     m = len(pat)
-    n = len(txt)
 
-    # preprocessing of the pattern string
-    bad_chars = extended_bad_character(pat)
-    gs_dicts = good_suffix(pat)
-    mp_values = matched_prefix(pat)
+    z_suffix = gusfield_z(pat[::-1])[::-1]
+    good = array("i", [-1]) * (m + 1)
+    strict = {}
 
-    matches = []
+    for p in range(m - 1):      # loop scaling with m, constant operations
+        j = m - z_suffix[p]
+        strict[(j, pat[p - z_suffix[p]])] = p
+        good[j] = p
+
+    return good, strict
+
+
+def rarest_character(txt: str, pat: str, blocks: int = 4, block_size: int = 1024) -> tuple[int, float]:
+    """
+    Find the character of the pattern which is the least frequent in the text, estimated from a few blocks of the text
+    spread evenly over it. The rightmost position is kept on ties.
 
-    shift = 0
-    stop = 0
-    start = 0
-    while shift <= n - m:   # while the pattern is still fully bounded by the text
-        k = m - 1           # start from the end of the pattern
+    Time Complexity: O(m + blocks * block_size)
 
-        # do a right-to-left comparison
-        while k >= 0 and pat[k] == txt[shift + k]:
-            if k == stop:   # Galil's optimization to skip through the characters we know match
-                k = start
-            k -= 1
+    :param txt: string or memoryview of the text
+    :param pat: pattern, of the same kind as the text
+    :param blocks: number of blocks sampled
+    :param block_size: length of each sampled block
+    :return: tuple of the position of the rarest character in the pattern and its estimated frequency in the text
+    """
+    n = len(txt)
+    counts = Counter()
+    sampled = 0
+    step = max(block_size, n // blocks)
+    for start in range(0, n, step)[:blocks]:
+        block = txt[start:start + block_size]
+        counts.update(block)
+        sampled += len(block)
 
-        if k < 0:   # if a match was found
-            matches.append(shift + 1)
+    index = min(reversed(range(len(pat))), key=lambda i: counts[pat[i]])
+    return index, counts[pat[index]] / max(1, sampled)
 
-            shift += m - mp_values[1] if shift + m < n else 1       # shift by the maximum amount allowed by the matched prefix rule
-        else:       # if a match was not found
-            x = txt[shift + k]  # bad character
 
-            # Get the bad-character shift
-            bc_shift = max(1, k - bad_chars[k][get_char_index(x)])
+def finditer_prefiltered(txt: str, pat: str, find, rare_index: int) -> Iterator[int]:
+    """
+    Search the text by jumping between the occurences of one character of the pattern with find, which runs at C speed,
+    and verifying the single alignment each occurence implies. Every match holds that character at rare_index, so no
+    match is missed, and each alignment is verified at most once. No Boyer-Moore table is needed: the jumps already
+    decide which alignment comes next, and verifying one alignment is a window comparison, done in C by
+    window_verifier.
+
+    Time Complexity: O(n + h * m) where h is the number of occurences of the character in the text
+
+    :param txt: main string to search through, or a memoryview of it
+    :param pat: pattern, of the same kind as the text
+    :param find: find method of the text (str.find, bytes.find, bytearray.find or mmap.find)
+    :param rare_index: position in the pattern of the character to jump between, see rarest_character
+    :return: generator of indices of where the pattern matches occur (1-indexing)
+    """
+    m = len(pat)
+    n = len(txt)
+    if m == 0 or n < m:
+        return
+
+    rare = pat[rare_index:rare_index + 1]
+    verify = window_verifier(txt, pat)
+    end = n - m + rare_index + 1    # the character sits at rare_index of the last alignment at most
+    position = find(rare, rare_index, end)
+    while position != -1:   # loop scales with the number of occurences of the character
+        shift = position - rare_index
+        if verify(pat, shift):
+            yield shift + 1
+        position = find(rare, position + 1, end)
+
+
+PATTERN_CACHE_SIZE = 4096
+# total number of table entries kept by compile_pattern, a full table entry takes about 30 bytes so this is about 60MB,
+# the full tables of a single 20000 character pattern already exceed it and are never cached
+PATTERN_CACHE_TABLE_SIZE = 1 << 21
+# Above this frequency the prefilter verifies an alignment every few characters and stops beating the skip loop, measured
+# with benchmark.compare_prefilter: it was still 2 to 30 times faster at 1 to 12%, even with DNA at 24%, and lost on binary
+# texts (50%) with long patterns
+RARE_CHARACTER_MAX_FREQUENCY = 0.25
+
+
+class BoyerMooreStats:
+    """
+    Counters collected by an instrumented Boyer-Moore search, to see where the time of a search goes
+    """
 
-            # Get the stricter good suffix shift
-            p = gs_dicts[k + 1][get_char_index(x)]
-            if p is None:
-                p = gs_dicts[k + 1]["GOOD"]
+    def __init__(self):
+        """
+        Constructor method for the BoyerMooreStats class, with every counter at 0
+        """
+        self.alignments = 0             # number of alignments of the pattern against the text
+        self.comparisons = 0            # number of explicit character comparisons
+        self.bad_character_wins = 0     # mismatches where the bad character shift was strictly the largest
+        self.good_suffix_wins = 0       # mismatches where the good suffix or matched prefix shift was at least as large
+        self.match_shifts = 0           # shifts done after a full match, using the matched prefix rule
+        self.galil_skipped = 0          # characters skipped by Galil's optimization
+        self.shift_histogram = Counter()    # shift length -> number of shifts of that length
+
+    def as_dict(self) -> dict:
+        """
+        Method to get the counters as a dictionary, with the shift histogram sorted by shift length
+
+        :return: dictionary of the counters
+        """
+        counters = dict(vars(self))
+        counters["shift_histogram"] = dict(sorted(self.shift_histogram.items()))
+        return counters
+
+
+class CompiledPattern:
+    """
+    Pattern string with its Boyer-Moore preprocessing done once, so that it can be searched against many texts
+    """
 
-            if p > 0:
-                stop = p - 1
-                start = p - m + k
+    def __init__(self, pat: str, compact: bool = False):
+        """
+        Constructor method for the CompiledPattern class, building the extended bad character, good suffix and matched
+        prefix tables of the pattern
+
+        Time Complexity: O(|A| * m) where |A| is the size of the alphabet and m is the length of the pattern string,
+        O(m) with the compact tables
+
+        :param pat: pattern to preprocess, a string, or bytes to search bytes-like texts
+        :param compact: use the compact array-backed tables, which trade a binary search per bad character lookup for
+                        O(m) instead of O(|A| * m) memory
+        """
+        self.pat = pat
+        self.compact = compact
+        if compact:
+            self.bad_chars = compact_bad_character(pat)
+            self.gs_dicts = compact_good_suffix(pat)
+        else:
+            self.bad_chars = extended_bad_character(pat)
+            self.gs_dicts = good_suffix(pat)
+        self.mp_values = matched_prefix(pat)
+
+    def table_size(self) -> int:
+        """
+        Method to get the number of entries of the tables, O(|A| * m) with the full tables and O(m) with the compact ones
+        """
+        if self.compact:
+            good, strict = self.gs_dicts
+            return len(self.pat) + len(good) + len(strict) + len(self.mp_values)
+        return len(self.bad_chars) * (NO_OF_CHARS + 1) + len(self.gs_dicts) * (NO_OF_CHARS + 2) + len(self.mp_values)
+
+    def shift_rules(self) -> tuple[Callable, Callable]:
+        """
+        Get the functions computing the shift of the pattern, shared by every search so that the shift rules and the
+        Galil region are only written once. Both return a tuple of the shift and of the region [start, stop] of the
+        pattern known to match the text after it, see finditer.
+
+        match_shift(shift, n): shift after a full match at shift, n being the length of the text, by the maximum amount
+        allowed by the matched prefix rule.
+
+        mismatch_shift(k, x): shift after a mismatch of the bad character x at position k of the pattern, the largest of
+        the bad character shift and of the stricter good suffix shift, or of the matched prefix shift when the good
+        suffix does not occur again in the pattern. stop is -1 when the bad character shift won.
+
+        :return: tuple of match_shift and mismatch_shift
+        """
+        m = len(self.pat)
+        char_index = get_index_function(self.pat)
+        bad_chars = self.bad_chars
+        gs_dicts = self.gs_dicts
+        mp_values = self.mp_values
+        compact = self.compact
+
+        def match_shift(shift: int, n: int) -> tuple[int, int, int]:
+            mp = mp_values[1]
+            return (m - mp if shift + m < n else 1), 0, mp     # the matched prefix now sits on text we know matches
+
+        def mismatch_shift(k: int, x) -> tuple[int, int, int]:
+            if compact:
+                # Get the bad-character shift, the rightmost occurence of x before k is found by binary search
+                positions = bad_chars.get(x)
+                i = bisect_left(positions, k) if positions else 0
+                bc_shift = max(1, k - (positions[i - 1] if i else -1))
+
+                # Get the stricter good suffix shift
+                p = gs_dicts[1].get((k + 1, x))
+                strict = p is not None
+                if not strict:
+                    p = gs_dicts[0][k + 1]
+            else:
+                # Get the bad-character shift
+                bc_shift = max(1, k - bad_chars[k][char_index(x)])
+
+                # Get the stricter good suffix shift
+                p = gs_dicts[k + 1][char_index(x)]
+                strict = p is not None
+                if not strict:
+                    p = gs_dicts[k + 1]["GOOD"]
+
+            # [start, stop - 1] is the part of the pattern known to match after the shift, that is, the good suffix
+            # occurrence ending at p, plus the character preceding it when the stricter rule applied
+            if p >= 0:
+                stop = p + 1
+                start = max(0, p - m + k + 1 if strict else p - m + k + 2)
                 gs_shift = m - p - 1
             else:
-                stop = mp_values[k + 1] - 1
+                stop = mp_values[k + 1]
                 start = 0
-                gs_shift = m - mp_values[k + 1] - 1
+                gs_shift = m - mp_values[k + 1]
+
+            if bc_shift > gs_shift:     # the known region only holds for the good suffix shift
+                stop = -1
+
+            # the highest valued shift
+            return max(bc_shift, gs_shift), start, stop
+
+        return match_shift, mismatch_shift
+
+    def finditer(self, txt: str) -> Iterator[int]:
+        """
+        Implementation of the boyer_moore algorithm with Galil optimization and the stricter good_suffix rule, yielding
+        the matches as they are found. After each shift, the characters of the pattern from start to stop - 1 are known
+        to match the text and are skipped by the comparison.
+
+        Time Complexity: O(n)
+
+        :param txt: main string to search through
+        :return: generator of indices of where the pattern matches occur (1-indexing)
+        """
+        pat = self.pat
+        match_shift, mismatch_shift = self.shift_rules()
+        m = len(pat)
+        n = len(txt)
+        if m == 0:
+            return
+
+        shift = 0
+        stop = 0
+        start = 0
+        while shift <= n - m:   # while the pattern is still fully bounded by the text
+            k = m - 1           # start from the end of the pattern
+
+            # do a right-to-left comparison
+            while k >= 0 and pat[k] == txt[shift + k]:
+                if k == stop:   # Galil's optimization to skip through the characters we know match
+                    k = start
+                k -= 1
+
+            if k < 0:   # if a match was found
+                yield shift + 1
+                length, start, stop = match_shift(shift, n)
+            else:       # if a match was not found
+                length, start, stop = mismatch_shift(k, txt[shift + k])
+            shift += length
+
+    def finditer_instrumented(self, txt: str, stats: BoyerMooreStats) -> Iterator[int]:
+        """
+        Same search as finditer, also recording its comparisons and shifts into stats. Only the comparison loop is
+        repeated, to count its comparisons, so that the uninstrumented search does not pay for any of the bookkeeping.
+
+        Time Complexity: O(n)
+
+        :param txt: main string to search through
+        :param stats: counters to update
+        :return: generator of indices of where the pattern matches occur (1-indexing)
+        """
+        shift_histogram = stats.shift_histogram
+        pat = self.pat
+        match_shift, mismatch_shift = self.shift_rules()
+        m = len(pat)
+        n = len(txt)
+        if m == 0:
+            return
+
+        shift = 0
+        stop = 0
+        start = 0
+        while shift <= n - m:   # while the pattern is still fully bounded by the text
+            k = m - 1           # start from the end of the pattern
+            stats.alignments += 1
+
+            # do a right-to-left comparison
+            while k >= 0:
+                stats.comparisons += 1
+                if pat[k] != txt[shift + k]:
+                    break
+                if k == stop:   # Galil's optimization to skip through the characters we know match
+                    stats.galil_skipped += max(0, stop - start)
+                    k = start
+                k -= 1
+
+            if k < 0:   # if a match was found
+                yield shift + 1
+                length, start, stop = match_shift(shift, n)
+                stats.match_shifts += 1
+            else:       # if a match was not found
+                length, start, stop = mismatch_shift(k, txt[shift + k])
+                if stop < 0:
+                    stats.bad_character_wins += 1
+                else:
+                    stats.good_suffix_wins += 1
+            shift += length
+            shift_histogram[length] += 1
+
+    def search(self, txt: str, mode: str = "all", k: int = None, stats: BoyerMooreStats = None):
+        """
+        Search the text for the pattern
+
+        Time Complexity: O(n), the search stops early in the "exists" and "first_k" modes
+
+        :param txt: main string to search through, or a bytes-like object, searched with the compiled bytes of the
+                    pattern when the pattern is a string
+        :param mode: one of MATCH_MODES, see collect_matches
+        :param k: number of matches to return in the "first_k" mode
+        :param stats: if given, counters updated by an instrumented search
+        :return: indices of where the pattern matches occur (1-indexing), or their count or existence depending on the mode
+        """
+        if not isinstance(txt, str):   # bytes mode, the text is searched in place through a memoryview
+            txt = as_byte_view(txt)
+            if isinstance(self.pat, str):
+                return compile_pattern(as_pattern_bytes(self.pat), self.compact).search(txt, mode, k, stats)
+        elif not isinstance(self.pat, str):
+            raise TypeError("a bytes pattern cannot be searched for in a str text")
+        if stats is not None:
+            return collect_matches(self.finditer_instrumented(txt, stats), mode, k)
+        return collect_matches(self.finditer(txt), mode, k)
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize", "table_size", "max_table_size"])
+
+
+class PatternCache:
+    """
+    LRU cache of compiled patterns, bounded both by the number of patterns and by the total number of entries of their
+    tables, since the full tables grow with |A| * m and a few long patterns would otherwise hold on to a lot of memory.
+    A pattern whose tables alone exceed max_table_size is compiled for the call but not kept.
+    """
+
+    def __init__(self, maxsize: int, max_table_size: int):
+        """
+        Constructor method for the PatternCache class
+
+        :param maxsize: maximum number of compiled patterns kept
+        :param max_table_size: maximum total number of table entries kept, see CompiledPattern.table_size
+        """
+        self.maxsize = maxsize
+        self.max_table_size = max_table_size
+        self.patterns = OrderedDict()   # (pattern, compact) -> compiled pattern, least recently used first
+        self.table_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, pat: str, compact: bool = False) -> CompiledPattern:
+        """
+        Get the compiled form of a pattern, reusing it when the pattern was seen recently
+
+        :param pat: pattern string to preprocess
+        :param compact: use the compact array-backed tables
+        :return: compiled pattern
+        """
+        key = (pat, compact)
+        compiled = self.patterns.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self.patterns.move_to_end(key)
+            return compiled
+
+        self.misses += 1
+        compiled = CompiledPattern(pat, compact)
+        size = compiled.table_size()
+        if size <= self.max_table_size:
+            self.patterns[key] = compiled
+            self.table_size += size
+            while len(self.patterns) > self.maxsize or self.table_size > self.max_table_size:
+                _, evicted = self.patterns.popitem(last=False)
+                self.table_size -= evicted.table_size()
+        return compiled
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Method to get the hits, misses, number of patterns and number of table entries of the cache, with their bounds
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.patterns), self.table_size, self.max_table_size)
+
+    def cache_clear(self) -> None:
+        """
+        Method to empty the cache and reset its counters, releasing the memory of the tables it held
+        """
+        self.patterns.clear()
+        self.table_size = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# compile_pattern(pat, compact) gets the compiled form of a pattern through the cache. compile_pattern.cache_info()
+# reports its hits, misses and sizes, and compile_pattern.cache_clear() releases the memory of every cached table.
+compile_pattern = PatternCache(PATTERN_CACHE_SIZE, PATTERN_CACHE_TABLE_SIZE)
+
+
+def boyer_moore(txt: str, pat: str, compact: bool = False, mode: str = "all", k: int = None, stats: bool = False,
+                prefilter: bool = False):
+    """
+    Implementation of the boyer_moore algorithm with Galil optimization and the stricter good_suffix rule. The
+    preprocessing of the pattern is cached, so repeated searches for the same pattern skip straight to the search. The
+    cache is bounded by PATTERN_CACHE_SIZE patterns and PATTERN_CACHE_TABLE_SIZE table entries, and
+    compile_pattern.cache_clear() releases it.
+
+    Time Complexity: O(m + n), O(n) if the pattern is cached
+
+    :param txt: main string to search through, or a bytes-like object (bytes, bytearray, memoryview, mmap) which is
+                searched without being copied or decoded
+    :param pat: pattern string to be matched against the main string txt
+    :param compact: use the compact array-backed tables, recommended for long patterns
+    :param mode: one of MATCH_MODES, see collect_matches
+    :param k: number of matches to return in the "first_k" mode
+    :param stats: also collect and return the BoyerMooreStats of the search
+    :param prefilter: jump between the occurences of the rarest character of the pattern with the C-level find of the
+                      text, see finditer_prefiltered, which builds no tables. Falls back to the plain search when that
+                      character is more frequent than RARE_CHARACTER_MAX_FREQUENCY, when the text has no find method
+                      (memoryview) or when stats is set.
+    :return: indices of where the matches occur (1-indexing), or their count or existence depending on the mode, paired
+             with the BoyerMooreStats if stats is set
+    """
+    find = getattr(txt, "find", None)
+    if not isinstance(txt, str):   # bytes mode, the text is searched in place through a memoryview
+        txt = as_byte_view(txt)
+        pat = as_pattern_bytes(pat)
 
-            # increment shift by the highest valued shift
-            shift += max(bc_shift, gs_shift)
+    if prefilter and not stats and find is not None and len(pat) > 0:
+        rare_index, frequency = rarest_character(txt, pat)
+        if frequency <= RARE_CHARACTER_MAX_FREQUENCY:
+            return collect_matches(finditer_prefiltered(txt, pat, find, rare_index), mode, k)
 
-    return matches
+    if stats:
+        collected = BoyerMooreStats()
+        return compile_pattern(pat, compact).search(txt, mode, k, collected), collected
+    return compile_pattern(pat, compact).search(txt, mode, k)
 
 
 if __name__ == "__main__":
-    _, filename1, filename2 = sys.argv
-    txt_str = read_file(filename1)
-    pat_str = read_file(filename2)
-    matching_ids = boyer_moore(txt_str, pat_str)
-    output_results(matching_ids, "output_stricterBM.txt")
+    parser = ArgumentParser()
+    parser.add_argument("txt_file")
+    parser.add_argument("pat_file")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="text writes one match per line, the others write a binary file readable by read_results")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="jump between the occurences of the rarest character of the pattern before verifying")
+    args = parser.parse_args()
+    txt_str = read_file(args.txt_file)
+    pat_str = read_file(args.pat_file)
+    matching_ids = boyer_moore(txt_str, pat_str, prefilter=args.prefilter)
+    output_results(matching_ids, f"output_stricterBM.{'txt' if args.format == 'text' else 'bin'}", args.format)
 
 
 
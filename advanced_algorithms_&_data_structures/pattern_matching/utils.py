@@ -1,12 +1,33 @@
+from array import array
+from itertools import islice
+from mmap import mmap, ACCESS_READ
+from typing import Callable, Iterable, Iterator, Union
+import sys
+
 NO_OF_CHARS = 94
 
+# number of results formatted and written at a time by output_results
+WRITE_BATCH_SIZE = 1 << 16
+
+# binary result files start with RESULTS_MAGIC followed by one byte giving the format
+RESULTS_MAGIC = b"PMR"
+OUTPUT_FORMATS = ("text", "u32", "u64", "varint")
+
+# index shared by every character outside of the alphabet, the tables have one extra column for it
+OTHER_CHAR_INDEX = NO_OF_CHARS
+
+# translation table from a byte to its character index, replacing get_char_index for bytes-like inputs
+BYTE_INDEX = tuple(b - 33 if 33 <= b < 33 + NO_OF_CHARS else OTHER_CHAR_INDEX for b in range(256))
 
-def gusfield_z(txt: str) -> list[int]:
+MATCH_MODES = ("all", "count", "exists", "first_k")
+
+
+def gusfield_z(txt: Union[str, bytes, memoryview]) -> list[int]:
     """
     Implementation of Gusfield's Z-Algorithm to return the Z-values at each index of the string
     Time Complexity: O(n) where n is the length of the input string txt
 
-    :param txt: String to preprocess
+    :param txt: String to preprocess, or any bytes-like object indexable by position such as a memoryview
     :return: an array of Z-values for the input string
     """
     n = len(txt)
@@ -14,23 +35,23 @@ def gusfield_z(txt: str) -> list[int]:
     left = 0
     right = 0
 
-    def explicit_comparison(start: int, end: int) -> None:
+    def explicit_comparison(start: int, end: int) -> int:
         """
-        Helper function to explicitly compare a string to its substring until a mismatch occurs. Arguments are modified.
+        Helper function to explicitly compare a string to its substring until a mismatch occurs.
 
         :param start: index to start matching
         :param end: index to end matching
-        :return: None
+        :return: the new right end of the z-box, that is, the last index which matched
         """
         while end < n and txt[end - start] == txt[end]:
             end += 1
         z_array[k] = end - start
-        end -= 1
+        return end - 1
 
     for k in range(1, n):
         if k > right:   # case 1
-            left, right = k, k
-            explicit_comparison(left, right)
+            left = k
+            right = explicit_comparison(left, k)
 
         else:           # case 2
             index = k - left
@@ -38,7 +59,7 @@ def gusfield_z(txt: str) -> list[int]:
                 z_array[k] = z_array[index]
             else:                           # case 2b
                 left = k
-                explicit_comparison(left, right)
+                right = explicit_comparison(left, right)
 
     return z_array
 
@@ -54,6 +75,83 @@ def get_char_index(char: str) -> int:
     return ord(char) - 33
 
 
+def get_table_index(char: str) -> int:
+    """
+    Utility function to get the index of a string character in the tables, which is get_char_index for the characters of
+    the alphabet and OTHER_CHAR_INDEX for every other character, such as a space or the newline kept by read_file
+    Time Complexity: O(1)
+
+    :param char: any character
+    :return: character index value
+    """
+    index = ord(char) - 33
+    return index if 0 <= index < NO_OF_CHARS else OTHER_CHAR_INDEX
+
+
+def get_index_function(data: Union[str, bytes, memoryview]) -> Callable:
+    """
+    Utility function to get the function mapping an element of data to its character index, which is get_table_index for
+    strings and a lookup in BYTE_INDEX for bytes-like objects, whose elements are integers. Both map the characters
+    outside of the alphabet to OTHER_CHAR_INDEX.
+
+    :param data: string or bytes-like object
+    :return: character index function
+    """
+    return get_table_index if isinstance(data, str) else BYTE_INDEX.__getitem__
+
+
+def as_byte_view(data) -> memoryview:
+    """
+    Utility function to get a flat memoryview of bytes over any bytes-like object (bytes, bytearray, memoryview, mmap)
+    without copying it. Indexing and iterating the view both give integers, unlike iterating an mmap.
+
+    :param data: bytes-like object
+    :return: memoryview of unsigned bytes
+    """
+    view = memoryview(data)
+    return view if view.format == "B" and view.ndim == 1 else view.cast("B")
+
+
+def as_pattern_bytes(pat) -> bytes:
+    """
+    Utility function to convert a pattern to bytes, so that it can be compared against a bytes-like text
+
+    :param pat: pattern as a string or a bytes-like object
+    :return: pattern as bytes
+    """
+    return pat.encode("latin-1") if isinstance(pat, str) else bytes(pat)
+
+
+def window_verifier(txt, pat):
+    """
+    Utility function to get the function checking whether pat occurs in txt at a given shift. Strings use str.startswith,
+    which compares in place at C speed and stops at the first mismatch, memoryviews compare a slice of the view, which
+    does not copy the text either.
+
+    :param txt: string or memoryview of the text
+    :param pat: pattern, of the same kind as the text
+    :return: function taking (pat, shift) and returning whether the window matches
+    """
+    if isinstance(txt, str):
+        return txt.startswith
+    m = len(pat)
+    return lambda pattern, shift: txt[shift:shift + m] == pattern
+
+
+def map_file(file_path: str) -> mmap:
+    """
+    Utility function to memory-map a whole file for reading, so that it can be searched without reading or decoding it.
+    The mapping must be closed once every memoryview of it has been released.
+
+    :param file_path: file path
+    :return: read-only memory map of the file
+    """
+    f = open(file_path, "rb")
+    mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+    f.close()       # the mapping stays valid after the file is closed
+    return mapped
+
+
 def read_file(file_path: str) -> str:
     """
     Utility function to read file and return its content
@@ -67,15 +165,134 @@ def read_file(file_path: str) -> str:
     return line
 
 
-def output_results(outputs: list, output_file: str) -> None:
+def output_results(outputs: Iterable, output_file: str, fmt: str = "text") -> None:
     """
-    Utility function to write output into output_file
+    Utility function to write output into output_file. Results are written in batches of WRITE_BATCH_SIZE instead of
+    one write per result, and outputs can be a generator, in which case it is never fully held in memory.
 
-    :param outputs: results to output taken as a list
+    Formats:
+        "text": one result per line
+        "u32", "u64": little-endian array of unsigned 32 or 64-bit integers
+        "varint": LEB128 varints of the differences between consecutive results, which must be sorted
+
+    :param outputs: results to output, taken as a list or any iterable, integers only for the binary formats
     :param output_file: output file path/name
+    :param fmt: one of OUTPUT_FORMATS
     :return: None
     """
-    f = open(output_file, "w")
-    for item in outputs:
-        f.write(f"{item}\n")
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown format {fmt!r}, expected one of {OUTPUT_FORMATS}")
+
+    outputs = iter(outputs)
+    if fmt == "text":
+        f = open(output_file, "w")
+        batch = list(islice(outputs, WRITE_BATCH_SIZE))
+        while batch:
+            f.write("\n".join(map(str, batch)) + "\n")
+            batch = list(islice(outputs, WRITE_BATCH_SIZE))
+        f.close()
+        return
+
+    f = open(output_file, "wb")
+    f.write(RESULTS_MAGIC + bytes([OUTPUT_FORMATS.index(fmt)]))
+    previous = 0
+    batch = list(islice(outputs, WRITE_BATCH_SIZE))
+    while batch:
+        if fmt == "varint":
+            f.write(encode_varint_deltas(batch, previous))
+            previous = batch[-1]
+        else:
+            values = array("I" if fmt == "u32" else "Q", batch)
+            if sys.byteorder != "little":
+                values.byteswap()
+            values.tofile(f)
+        batch = list(islice(outputs, WRITE_BATCH_SIZE))
     f.close()
+
+
+def encode_varint_deltas(values: list[int], previous: int = 0) -> bytearray:
+    """
+    Utility function to encode sorted integers as LEB128 varints of their differences, so that dense matches take a
+    single byte each
+
+    :param values: sorted non-negative integers
+    :param previous: value preceding values[0], 0 for the start of the sequence
+    :return: encoded bytes
+    """
+    encoded = bytearray()
+    for value in values:
+        delta = value - previous
+        if delta < 0:
+            raise ValueError("varint delta encoding requires sorted results")
+        while delta >= 0x80:
+            encoded.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        encoded.append(delta)
+        previous = value
+    return encoded
+
+
+def read_results(file_path: str) -> list:
+    """
+    Utility function to read a file written by output_results in any of the OUTPUT_FORMATS, detecting the format from
+    its header. Text results which are integers are converted back to integers.
+
+    :param file_path: file path
+    :return: results
+    """
+    f = open(file_path, "rb")
+    data = f.read()
+    f.close()
+
+    if not (data[:len(RESULTS_MAGIC)] == RESULTS_MAGIC and len(data) > len(RESULTS_MAGIC)
+            and data[len(RESULTS_MAGIC)] < len(OUTPUT_FORMATS)):
+        lines = data.decode().splitlines()
+        return [int(line) if line.lstrip("-").isdigit() else line for line in lines]
+
+    fmt = OUTPUT_FORMATS[data[len(RESULTS_MAGIC)]]
+    body = memoryview(data)[len(RESULTS_MAGIC) + 1:]
+    if fmt == "varint":
+        results = []
+        value = 0
+        delta = 0
+        bit = 0
+        for byte in body:
+            delta |= (byte & 0x7F) << bit
+            if byte & 0x80:
+                bit += 7
+            else:
+                value += delta
+                results.append(value)
+                delta = 0
+                bit = 0
+        return results
+
+    values = array("I" if fmt == "u32" else "Q")
+    values.frombytes(body)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
+
+def collect_matches(matches: Iterator[int], mode: str = "all", k: int = None) -> Union[list[int], int, bool]:
+    """
+    Utility function to consume a generator of matches according to the requested mode, so that no list of positions
+    is built unless it is needed and the search stops as soon as the answer is known
+
+    :param matches: generator of match positions
+    :param mode: "all" for the list of positions, "count" for the number of matches, "exists" for whether there is any
+                 match and "first_k" for the list of the first k positions
+    :param k: number of positions to return in the "first_k" mode
+    :return: positions, count or existence of the matches depending on the mode
+    """
+    if mode == "all":
+        return list(matches)
+    if mode == "count":
+        return sum(1 for _ in matches)
+    if mode == "exists":
+        return next(matches, None) is not None
+    if mode == "first_k":
+        if k is None or k < 0:
+            raise ValueError("first_k mode requires a non-negative k")
+        return list(islice(matches, k))
+    raise ValueError(f"unknown mode {mode!r}, expected one of {MATCH_MODES}")